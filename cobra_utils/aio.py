@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from cobra_utils import io
+from cobra_utils import query
+from cobra_utils import topology
+
+
+def _frame_key(df):
+    '''
+    Builds a hash of the content of a dataframe or series (index and values).
+    '''
+    hashes = pd.util.hash_pandas_object(df, index=True).values
+    if isinstance(df, pd.DataFrame):
+        labels = list(df.columns)
+    else:
+        labels = [df.name]
+    return hashlib.sha1(hashes.tobytes() + repr(labels).encode('utf-8')).hexdigest()
+
+
+def _value_key(value):
+    '''
+    Builds a hash of the content of an argument. repr() is not used, since it truncates large arrays and dataframes.
+    Objects that cannot be pickled (e.g. models) are identified by their id, as the model argument.
+    '''
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return ('frame', _frame_key(value))
+    if isinstance(value, np.ndarray) and value.dtype != object:
+        digest = hashlib.sha1(np.ascontiguousarray(value).tobytes())
+        digest.update('{};{}'.format(value.dtype.str, value.shape).encode('utf-8'))
+        return ('array', digest.hexdigest())
+    try:
+        return ('pickle', hashlib.sha1(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)).hexdigest())
+    except Exception:
+        return ('id', id(value))
+
+
+def _args_key(args):
+    return tuple(_value_key(value) for value in args)
+
+
+def _kwargs_key(kwargs):
+    return tuple(sorted((key, _value_key(value)) for key, value in kwargs.items()))
+
+
+class AsyncRunner(object):
+    '''
+    This class provides asyncio counterparts of the io, query and topology functions. Each call runs in an executor
+    pool, so the event loop is not blocked, with a bounded number of calls running at the same time.
+
+    Concurrent calls loading the same model file, or running the same analysis on the same model and p-values, are
+    coalesced into a single computation whose result is shared by all callers. A call that is cancelled by all of its
+    callers before starting is never run.
+
+    Parameters
+    ----------
+    max_workers : int, None by default.
+        Number of workers of the executor pool created by this runner. See concurrent.futures for the default value.
+
+    max_concurrency : int, None by default.
+        Maximum number of calls submitted to the executor at the same time. The rest wait in the event loop, where
+        they can be cancelled. If None, max_workers is used (or no limit when max_workers is also None).
+
+    executor : str or concurrent.futures.Executor, 'thread' by default.
+        Executor used to run the calls. Options to use:
+        'thread' for a ThreadPoolExecutor
+        'process' for a ProcessPoolExecutor. Models and dataframes are copied to the worker processes.
+        An Executor instance, which is not shut down by this runner.
+
+    Examples
+    --------
+    >>> async with AsyncRunner(max_workers=4) as runner:
+    ...     model = await runner.load_model('model.xml', format='sbml')
+    ...     met_p_values = await runner.reporter_metabolites(model, p_val_df)
+    '''
+    def __init__(self, max_workers=None, max_concurrency=None, executor='thread'):
+        if isinstance(executor, Executor):
+            self._executor = executor
+            self._own_executor = False
+        elif executor == 'thread':
+            self._executor = ThreadPoolExecutor(max_workers=max_workers)
+            self._own_executor = True
+        elif executor == 'process':
+            self._executor = ProcessPoolExecutor(max_workers=max_workers)
+            self._own_executor = True
+        else:
+            raise NotImplementedError("Executor {} not implemented. Specify 'thread', 'process' or an Executor".format(executor))
+
+        if max_concurrency is None:
+            max_concurrency = max_workers
+        self._max_concurrency = max_concurrency
+        self._semaphore = None
+        self._inflight = dict()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        self.shutdown(wait=False)
+
+    def shutdown(self, wait=True):
+        '''
+        Shuts down the executor pool when it was created by this runner.
+        '''
+        if self._own_executor:
+            self._executor.shutdown(wait=wait)
+
+    async def _execute(self, func, args, kwargs):
+        loop = asyncio.get_running_loop()
+        if self._max_concurrency is None:
+            return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+        await self._semaphore.acquire()
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._semaphore.release()
+            raise
+        # The slot is released when the call actually finishes, even if its callers were cancelled meanwhile.
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._semaphore.release))
+        return await asyncio.wrap_future(future)
+
+    async def run(self, func, *args, key=None, **kwargs):
+        '''
+        This function runs func(*args, **kwargs) in the executor pool.
+
+        Parameters
+        ----------
+        func : callable
+            The blocking function to run. It has to be picklable when using a process pool.
+
+        *args, **kwargs :
+            Arguments passed to func.
+
+        key : hashable, None by default.
+            If given, concurrent calls with the same key share a single computation.
+
+        Returns
+        -------
+        result : object
+            The value returned by func.
+        '''
+        if key is None:
+            return await self._execute(func, args, kwargs)
+
+        if key in self._inflight:
+            task, waiters = self._inflight[key]
+        else:
+            task = asyncio.ensure_future(self._execute(func, args, kwargs))
+            waiters = [0]
+            self._inflight[key] = (task, waiters)
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+
+        waiters[0] += 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if not task.done() and waiters[0] == 1:
+                task.cancel()
+            raise
+        finally:
+            waiters[0] -= 1
+
+    async def load_model(self, filename, format='matlab', verbose=False, cache=True):
+        '''
+        Async counterpart of cobra_utils.io.load_model. Concurrent calls for the same file and format are coalesced.
+        '''
+        filename = os.path.abspath(filename)
+        key = ('load_model', filename, format, os.path.getmtime(filename))
+        return await self.run(io.load_model, filename, format=format, verbose=verbose, cache=cache, key=key)
+
+    async def save_model(self, *args, **kwargs):
+        '''
+        Async counterpart of cobra_utils.io.save_model. Calls are never coalesced.
+        '''
+        kwargs.setdefault('verbose', False)
+        return await self.run(io.save_model, *args, **kwargs)
+
+    async def reporter_metabolites(self, model, p_val_df, **kwargs):
+        '''
+        Async counterpart of cobra_utils.topology.reporter_metabolites. Concurrent calls with the same model object,
+        p-values and arguments are coalesced.
+        '''
+        kwargs.setdefault('verbose', False)
+        key = ('reporter_metabolites', id(model), _frame_key(p_val_df), _kwargs_key(kwargs))
+        return await self.run(topology.reporter_metabolites, model, p_val_df, key=key, **kwargs)
+
+    async def reporter_pathways(self, model, p_val_df, **kwargs):
+        '''
+        Async counterpart of cobra_utils.topology.reporter_pathways. Concurrent calls with the same model object,
+        p-values and arguments are coalesced.
+        '''
+        kwargs.setdefault('verbose', False)
+        key = ('reporter_pathways', id(model), _frame_key(p_val_df), _kwargs_key(kwargs))
+        return await self.run(topology.reporter_pathways, model, p_val_df, key=key, **kwargs)
+
+    async def query(self, name, model, *args, **kwargs):
+        '''
+        Async counterpart of the functions in cobra_utils.query. Concurrent calls with the same function, model object
+        and arguments are coalesced.
+
+        Parameters
+        ----------
+        name : str
+            Name of the function in cobra_utils.query, e.g. 'rxn_info_from_genes' or 'met_info_from_model'.
+
+        model : cobra.core.Model.Model
+            A cobra model.
+
+        *args, **kwargs :
+            Arguments passed to the function.
+
+        Returns
+        -------
+        result : object
+            The value returned by the function.
+        '''
+        func = getattr(query, name)
+        if 'verbose' in inspect.signature(func).parameters:
+            kwargs.setdefault('verbose', False)
+        key = ('query', name, id(model), _args_key(args), _kwargs_key(kwargs))
+        return await self.run(func, model, *args, key=key, **kwargs)
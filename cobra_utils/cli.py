@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cobra_utils import io
+from cobra_utils import query
+from cobra_utils import topology
+
+
+_TABLE_EXTENSIONS = ('.csv', '.tsv', '.txt', '.xlsx', '.xls')
+
+_OUTPUT_EXTENSIONS = {'csv': '.csv', 'tsv': '.tsv', 'parquet': '.parquet', 'feather': '.feather'}
+
+# Model used by the reporter jobs. It is loaded once per process.
+_MODEL = None
+
+
+def _init_model(model_file, format):
+    global _MODEL
+    _MODEL = io.load_model(model_file, format=format, verbose=False, cache=True)
+
+
+def find_tables(paths):
+    '''
+    This function expands a list of files, directories or glob patterns into a sorted list of p-value tables.
+
+    Parameters
+    ----------
+    paths : array-like
+        An iterable object containing filenames, directories (all the .csv, .tsv, .txt, .xlsx and .xls files inside
+        are used) or glob patterns.
+
+    Returns
+    -------
+    tables : list
+        A list containing the filenames of the tables found.
+    '''
+    tables = []
+    for path in paths:
+        if os.path.isdir(path):
+            candidates = [os.path.join(path, f) for f in os.listdir(path)]
+        elif os.path.isfile(path):
+            candidates = [path]
+        else:
+            candidates = glob.glob(path)
+        tables.extend([f for f in candidates if os.path.isfile(f) and f.lower().endswith(_TABLE_EXTENSIONS)])
+    return sorted(set(tables))
+
+
+def read_table(filename, column=None):
+    '''
+    This function opens a table containing gene ids in the first column and the p-values in the column indicated.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the table. Separator is inferred from the extension (.csv, .tsv, .txt, .xlsx or .xls).
+
+    column : str, None by default.
+        Name of the column containing the p-values. If None, the first column after the gene ids is used.
+
+    Returns
+    -------
+    p_val_df : pandas.DataFrame
+        A dataframe with gene ids as index and a single column containing the p-values.
+    '''
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in ('.xlsx', '.xls'):
+        df = pd.read_excel(filename, index_col=0)
+    elif ext == '.csv':
+        df = pd.read_csv(filename, index_col=0)
+    else:
+        df = pd.read_csv(filename, index_col=0, sep='\t')
+
+    if column is None:
+        column = df.columns[0]
+    return df[[column]]
+
+
+def _run_reporter(filename, analysis, column):
+    start = time.time()
+    p_val_df = read_table(filename, column=column)
+    if analysis == 'metabolites':
+        result = topology.reporter_metabolites(_MODEL, p_val_df, verbose=False)
+        result.index.name = 'MetID'
+    else:
+        result = topology.reporter_pathways(_MODEL, p_val_df, verbose=False)
+        result.index.name = 'SubSystem'
+    return result, time.time() - start
+
+
+def _write_result(result, filename, output_format, index=True):
+    if output_format == 'csv':
+        result.to_csv(filename, index=index)
+    elif output_format == 'tsv':
+        result.to_csv(filename, sep='\t', index=index)
+    else:
+        io.save_table(result, filename, format=output_format)
+
+
+def _table_name(table):
+    return os.path.splitext(os.path.basename(table))[0]
+
+
+def _output_filename(output_dir, table, analysis, output_format):
+    name = _table_name(table)
+    return os.path.join(output_dir, '{}_reporter_{}{}'.format(name, analysis, _OUTPUT_EXTENSIONS[output_format]))
+
+
+def run_reporter(args):
+    '''
+    Runs reporter metabolites and/or pathways for each p-value table, loading the model only once per process.
+    Results are written as soon as each job finishes.
+    '''
+    timings = []
+    start = time.time()
+
+    tables = find_tables(args.tables)
+    if len(tables) == 0:
+        raise ValueError('No p-value tables were found in {}'.format(args.tables))
+    # Results are named after the tables, so tables with the same name would overwrite each other's results
+    groups = dict()
+    for table in tables:
+        groups.setdefault(_table_name(table), []).append(table)
+    duplicated = [', '.join(group) for group in groups.values() if len(group) > 1]
+    if len(duplicated) > 0:
+        raise ValueError('P-value tables with the same name would write the same result files: {}. Rename them or '
+                         'run them separately with different output directories'.format('; '.join(duplicated)))
+
+    load_start = time.time()
+    _init_model(args.model, args.format)
+    timings.append(('load model', time.time() - load_start))
+    print('Model {} loaded. Running {} analyses over {} tables'.format(args.model, args.analysis, len(tables)))
+
+    if not os.path.isdir(args.output_dir):
+        os.makedirs(args.output_dir)
+
+    analyses = ['metabolites', 'pathways'] if args.analysis == 'both' else [args.analysis]
+    jobs = [(table, analysis) for table in tables for analysis in analyses]
+
+    def report(job, result, seconds):
+        table, analysis = job
+        filename = _output_filename(args.output_dir, table, analysis, args.output_format)
+        _write_result(result, filename, args.output_format)
+        timings.append(('{} ({})'.format(os.path.basename(table), analysis), seconds))
+        print('{:.2f} s\t{}'.format(seconds, filename))
+        sys.stdout.flush()
+
+    if args.jobs == 1:
+        for job in jobs:
+            result, seconds = _run_reporter(job[0], job[1], args.column)
+            report(job, result, seconds)
+    else:
+        with ProcessPoolExecutor(max_workers=args.jobs,
+                                 initializer=_init_model,
+                                 initargs=(args.model, args.format)) as executor:
+            futures = {executor.submit(_run_reporter, job[0], job[1], args.column): job for job in jobs}
+            for future in as_completed(futures):
+                result, seconds = future.result()
+                report(futures[future], result, seconds)
+
+    _print_timings(timings, time.time() - start)
+
+
+def run_info(args):
+    '''
+    Writes the information of all reactions or metabolites in the model.
+    '''
+    start = time.time()
+    model = io.load_model(args.model, format=args.format, verbose=False)
+    load_time = time.time() - start
+
+    query_start = time.time()
+    if args.type == 'reactions':
+        info = query.rxn_info_from_model(model, verbose=False)
+    else:
+        info = query.met_info_from_model(model, verbose=False)
+    query_time = time.time() - query_start
+
+    output_format = args.output_format
+    if output_format is None:
+        output_format = os.path.splitext(args.output)[1].lower().lstrip('.')
+    if output_format not in _OUTPUT_EXTENSIONS:
+        raise NotImplementedError("Output format {} not implemented. Use one of {}".format(output_format,
+                                                                                         list(_OUTPUT_EXTENSIONS)))
+    _write_result(info, args.output, output_format, index=False)
+    _print_timings([('load model', load_time), ('query {}'.format(args.type), query_time)], time.time() - start)
+
+
+def _print_timings(timings, total):
+    print('\nTiming summary')
+    print('--------------')
+    for name, seconds in timings:
+        print('{:10.2f} s\t{}'.format(seconds, name))
+    print('{:10.2f} s\ttotal (wall clock)'.format(total))
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='cobra-utils',
+                                     description='Batch utilities for COBRA models.')
+    subparsers = parser.add_subparsers(dest='command')
+    subparsers.required = True
+
+    reporter = subparsers.add_parser('reporter',
+                                     help='Run reporter metabolites and/or pathways over many p-value tables.')
+    reporter.add_argument('model', help='File containing the model.')
+    reporter.add_argument('tables', nargs='+',
+                          help='P-value tables, directories containing them or glob patterns. Gene ids must be in '
+                               'the first column.')
+    reporter.add_argument('--format', default='sbml', choices=['json', 'matlab', 'sbml', 'yaml'],
+                          help='Format of the model file (default: sbml).')
+    reporter.add_argument('--analysis', default='both', choices=['metabolites', 'pathways', 'both'],
+                          help='Analysis to run on each table (default: both).')
+    reporter.add_argument('--column', default=None,
+                          help='Column containing the p-values (default: first column after gene ids).')
+    reporter.add_argument('-j', '--jobs', type=int, default=1,
+                          help='Number of tables analyzed in parallel (default: 1).')
+    reporter.add_argument('-o', '--output-dir', default='.',
+                          help='Directory where the results are written (default: current directory).')
+    reporter.add_argument('--output-format', default='csv', choices=list(_OUTPUT_EXTENSIONS),
+                          help='Format of the result files (default: csv).')
+    reporter.set_defaults(func=run_reporter)
+
+    info = subparsers.add_parser('info', help='Write the information of all reactions or metabolites in a model.')
+    info.add_argument('model', help='File containing the model.')
+    info.add_argument('output', help='Output file.')
+    info.add_argument('--format', default='sbml', choices=['json', 'matlab', 'sbml', 'yaml'],
+                      help='Format of the model file (default: sbml).')
+    info.add_argument('--type', default='reactions', choices=['reactions', 'metabolites'],
+                      help='Information to retrieve (default: reactions).')
+    info.add_argument('--output-format', default=None, choices=list(_OUTPUT_EXTENSIONS),
+                      help='Format of the output file (default: inferred from its extension).')
+    info.set_defaults(func=run_info)
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
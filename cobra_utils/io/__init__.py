@@ -2,5 +2,6 @@
 
 from __future__ import absolute_import
 
-from cobra_utils.io.load_data import load_model
-from cobra_utils.io.save_data import save_model
\ No newline at end of file
+from cobra_utils.io.load_data import clear_model_cache, load_model
+from cobra_utils.io.save_data import save_model, save_models
+from cobra_utils.io.arrow_data import dataframe_to_table, load_table, records_to_table, save_table
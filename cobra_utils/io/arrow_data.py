@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import pandas as pd
+
+
+_DICTIONARY_COLUMNS = ('SubSystem', 'Subsystem')
+
+
+def _import_pyarrow():
+    try:
+        import pyarrow
+    except ImportError:
+        raise ImportError("pyarrow is required for Arrow outputs. Install it with: pip install pyarrow")
+    return pyarrow
+
+
+def _is_dictionary_column(name):
+    '''
+    ID, name and subsystem columns are highly repetitive, so they are dictionary-encoded.
+    '''
+    name = str(name)
+    return name.endswith('ID') or name.endswith('Name') or name in _DICTIONARY_COLUMNS
+
+
+def records_to_table(records, columns, output='pandas'):
+    '''
+    This function builds a table from a list of tuples (records), as generated by the query functions.
+
+    Parameters
+    ----------
+    records : list
+        A list of tuples, each one being a row of the table.
+
+    columns : list
+        A list containing the names of the columns.
+
+    output : str, 'pandas' by default.
+        Type of the table to build. Options to use:
+        'pandas' for a pandas.DataFrame
+        'arrow' for a pyarrow.Table, with ID, name and subsystem columns dictionary-encoded.
+
+    Returns
+    -------
+    table : pandas.DataFrame or pyarrow.Table
+        The resulting table.
+    '''
+    if output == 'pandas':
+        return pd.DataFrame.from_records(records, columns=columns)
+    elif output == 'arrow':
+        pa = _import_pyarrow()
+        if len(records) != 0:
+            values = list(zip(*records))
+        else:
+            values = [[] for _ in columns]
+        arrays = []
+        for name, col in zip(columns, values):
+            array = pa.array(col, type=pa.string() if len(col) == 0 else None)
+            if _is_dictionary_column(name) and pa.types.is_string(array.type):
+                array = array.dictionary_encode()
+            arrays.append(array)
+        return pa.Table.from_arrays(arrays, names=list(columns))
+    else:
+        raise NotImplementedError("Output {} not implemented. Specify 'pandas' or 'arrow'".format(output))
+
+
+def dataframe_to_table(df, index_label=None):
+    '''
+    This function converts a pandas dataframe into an Arrow table, with ID, name and subsystem columns
+    dictionary-encoded.
+
+    Parameters
+    ----------
+    df : pandas.DataFrame
+        A dataframe, such as the outputs of the query and topology functions.
+
+    index_label : str, None by default.
+        If given, the index of the dataframe is kept as a first column with this name. Otherwise, the index is
+        dropped.
+
+    Returns
+    -------
+    table : pyarrow.Table
+        The resulting table.
+    '''
+    pa = _import_pyarrow()
+    if index_label is not None:
+        df = df.rename_axis(index_label).reset_index()
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    for i, name in enumerate(table.column_names):
+        column = table.column(i)
+        if _is_dictionary_column(name) and pa.types.is_string(column.type):
+            table = table.set_column(i, name, column.dictionary_encode())
+    return table
+
+
+def save_table(table, filename, format='parquet', **kwargs):
+    '''
+    This function saves a table into a Parquet or Feather (Arrow IPC) file.
+
+    Parameters
+    ----------
+    table : pyarrow.Table or pandas.DataFrame
+        The table to save. Dataframes are converted with dataframe_to_table, keeping their index as a column when
+        it is named.
+
+    filename : str
+        Filename of the table to save. It is preferable to use absolute path.
+
+    format : str, 'parquet' by default.
+        Format of the file. Options to use:
+        'parquet' for .parquet file
+        'feather' for .feather or .arrow file. These files are written uncompressed by default (instead of
+        pyarrow's LZ4), so load_table can memory-map them without copying the data. Pass compression='lz4' or
+        compression='zstd' to get smaller files instead.
+
+    **kwargs : dict
+        Extra arguments passed to pyarrow.parquet.write_table or pyarrow.feather.write_feather.
+    '''
+    pa = _import_pyarrow()
+    if isinstance(table, pd.DataFrame):
+        table = dataframe_to_table(table, index_label=table.index.name)
+
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        pq.write_table(table, filename, **kwargs)
+    elif format == 'feather':
+        import pyarrow.feather as feather
+        kwargs.setdefault('compression', 'uncompressed')
+        feather.write_feather(table, filename, **kwargs)
+    else:
+        raise NotImplementedError("Format {} not implemented. Specify 'parquet' or 'feather'".format(format))
+
+
+def load_table(filename, format='parquet', memory_map=True):
+    '''
+    This function opens a table saved with save_table.
+
+    Parameters
+    ----------
+    filename : str
+        Filename of the table to open. It is preferable to use absolute path.
+
+    format : str, 'parquet' by default.
+        Format of the file. Options to use:
+        'parquet' for .parquet file
+        'feather' for .feather or .arrow file
+
+    memory_map : boolean, True by default.
+        A variable to memory-map the file instead of reading it into memory. For uncompressed Feather files, the
+        resulting table does not copy the data.
+
+    Returns
+    -------
+    table : pyarrow.Table
+        The table contained in the file.
+    '''
+    _import_pyarrow()
+    if format == 'parquet':
+        import pyarrow.parquet as pq
+        return pq.read_table(filename, memory_map=memory_map)
+    elif format == 'feather':
+        import pyarrow.feather as feather
+        return feather.read_table(filename, memory_map=memory_map)
+    else:
+        raise NotImplementedError("Format {} not implemented. Specify 'parquet' or 'feather'".format(format))
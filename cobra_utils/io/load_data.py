@@ -2,10 +2,79 @@
 
 from __future__ import absolute_import
 
+import gzip
+import io
+import os
+import shutil
+import tempfile
+
 import cobra
 
 
-def load_model(filename, format='matlab', verbose=True):
+_MODEL_CACHE = dict()
+
+_COMPRESSIONS = {'.gz': 'gzip',
+                 '.zst': 'zstd'}
+
+
+def _cache_key(filename, format):
+    filename = os.path.abspath(filename)
+    return (filename, format, os.path.getmtime(filename))
+
+
+def _compression_from_filename(filename):
+    ext = os.path.splitext(str(filename))[1].lower()
+    return _COMPRESSIONS.get(ext)
+
+
+def _compressed_reader(filename, compression):
+    '''
+    Opens a binary file handle that decompresses the content of filename while it is read.
+    '''
+    if compression == 'gzip':
+        return gzip.open(filename, 'rb')
+    else:
+        import zstandard
+        return zstandard.ZstdDecompressor().stream_reader(open(filename, 'rb'), closefd=True)
+
+
+def _read_model(filename, format):
+    if format == 'json':
+        return cobra.io.load_json_model(filename)
+    elif format == 'matlab':
+        return cobra.io.load_matlab_model(filename)
+    elif format == 'sbml':
+        return cobra.io.read_sbml_model(filename)
+    elif format == 'yaml':
+        return cobra.io.load_yaml_model(filename)
+    else:
+        raise NotImplementedError("Format {} not implemented. Specify a correct format for the model".format(format))
+
+
+def _read_compressed_model(filename, format, compression):
+    if format == 'matlab':
+        # .mat files are binary and read by scipy, so they are decompressed into a temporary file first
+        fd, tmp_filename = tempfile.mkstemp(suffix='.mat')
+        try:
+            with os.fdopen(fd, 'wb') as f_out, _compressed_reader(filename, compression) as f_in:
+                shutil.copyfileobj(f_in, f_out)
+            return _read_model(tmp_filename, format)
+        finally:
+            os.remove(tmp_filename)
+    else:
+        # Text formats are decompressed while they are read
+        with io.TextIOWrapper(_compressed_reader(filename, compression), encoding='utf-8') as handle:
+            return _read_model(handle, format)
+
+
+def clear_model_cache():
+    '''
+    This function removes all the models stored by load_model when cache=True.
+    '''
+    _MODEL_CACHE.clear()
+
+
+def load_model(filename, format='matlab', verbose=True, cache=False):
     '''
     This function opens a metabolic reconstruction from a given format.
 
@@ -20,30 +89,47 @@ def load_model(filename, format='matlab', verbose=True):
         'matlab' for .mat file
         'sbml' for .xml file
         'yaml' for  .yaml or .yml file
+        Files compressed with gzip (.gz extension) or zstd (.zst extension, requires zstandard) are also opened, as
+        written by cobra_utils.io.save_model.
 
     verbose : boolean, True by default
         A variable to enable or disable the printings of this function.
 
+    cache : boolean, False by default
+        A variable to keep the loaded model in memory and return it in later calls with the same filename and format,
+        as long as the file has not been modified. The same model object is returned in each call, so it should not
+        be modified (use model.copy() instead).
+
     Returns
     -------
     model : cobra.core.Model.Model
         The resulting cobra model.
     '''
+    if cache:
+        key = _cache_key(filename, format)
+        if key in _MODEL_CACHE:
+            if verbose:
+                print('Using cached genome-scale model')
+            return _MODEL_CACHE[key]
+
     if verbose:
         print('Loading genome-scale model')
+    compression = _compression_from_filename(filename)
+    if compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required to open zstd files. Install it with: pip install zstandard")
     try:
-        if format == 'json':
-            model = cobra.io.load_json_model(filename)
-        elif format == 'matlab':
-            model = cobra.io.load_matlab_model(filename)
-        elif format == 'sbml':
-            model = cobra.io.read_sbml_model(filename)
-        elif format == 'yaml':
-            model = cobra.io.load_yaml_model(filename)
+        if compression is None or (format == 'sbml' and compression == 'gzip'):
+            # libsbml opens .gz files by itself
+            model = _read_model(filename, format)
         else:
-            raise NotImplementedError("Format {} not implemented. Specify a correct format for the model".format(format))
+            model = _read_compressed_model(filename, format, compression)
     except:
         raise ImportError("The file has an incorrect format or does not match with implemented formats")
+    if cache:
+        _MODEL_CACHE[key] = model
     if verbose:
         print('Model correctly loaded.')
     return model
\ No newline at end of file
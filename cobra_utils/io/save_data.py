@@ -2,15 +2,103 @@
 
 from __future__ import absolute_import
 
+import gzip
+import io
+import os
+import shutil
+import stat
+import tempfile
+import time
+import uuid
+
 import cobra
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+
+_EXTENSIONS = {'json': '.json',
+               'matlab': '.mat',
+               'sbml': '.xml',
+               'yaml': '.yml'}
 
+_COMPRESSION_EXTENSIONS = {'gzip': '.gz',
+                           'zstd': '.zst'}
 
-def save_model(filename, format='matlab', verbose=True, **kwargs):
+
+def _write_model(model, filename, format, **kwargs):
+    if format == 'json':
+        cobra.io.save_json_model(model, filename, **kwargs)
+    elif format == 'matlab':
+        cobra.io.save_matlab_model(model, filename, **kwargs)
+    elif format == 'sbml':
+        cobra.io.write_sbml_model(model, filename, **kwargs)
+    elif format == 'yaml':
+        cobra.io.save_yaml_model(model, filename, **kwargs)
+    else:
+        raise NotImplementedError("Format {} not implemented. Specify a correct format for the model".format(format))
+
+
+def _temporary_file(directory, suffix):
+    '''
+    Creates an empty temporary file with a unique name in directory. Unlike tempfile, it is created with the
+    permissions of a regular new file (the current umask is applied by the system).
     '''
-    This function saves a metabolic reconstruction into a given format.
+    while True:
+        filename = os.path.join(directory, '.tmp_{}{}'.format(uuid.uuid4().hex, suffix))
+        try:
+            fd = os.open(filename, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return filename
+
+
+def _copy_permissions(filename, target):
+    '''
+    Gives filename the permissions of the target file, when it already exists.
+    '''
+    if os.path.exists(target):
+        os.chmod(filename, stat.S_IMODE(os.stat(target).st_mode))
+
+
+def _compressed_writer(filename, compression, compression_level=None):
+    '''
+    Opens a binary file handle that compresses what is written into filename.
+    '''
+    if compression == 'gzip':
+        level = 9 if compression_level is None else compression_level
+        return gzip.open(filename, 'wb', compresslevel=level)
+    elif compression == 'zstd':
+        try:
+            import zstandard
+        except ImportError:
+            raise ImportError("zstandard is required for zstd compression. Install it with: pip install zstandard")
+        level = 3 if compression_level is None else compression_level
+        return zstandard.ZstdCompressor(level=level).stream_writer(open(filename, 'wb'), closefd=True)
+    else:
+        raise NotImplementedError("Compression {} not implemented. Specify 'gzip' or 'zstd'".format(compression))
+
+
+def _compress_file(source, destination, compression, compression_level=None):
+    '''
+    Streams the content of source into destination using the given compression.
+    '''
+    with open(source, 'rb') as f_in:
+        with _compressed_writer(destination, compression, compression_level) as f_out:
+            shutil.copyfileobj(f_in, f_out)
+
+
+def save_model(model, filename, format='matlab', verbose=True, compression=None, compression_level=None, **kwargs):
+    '''
+    This function saves a metabolic reconstruction into a given format. The model is first written into a temporary
+    file in the same directory, which is renamed when it is complete, so partially written files never appear.
 
     Parameters
     ----------
+    model : cobra.core.Model.Model
+        The cobra model to save.
+
     filename : str
         Filename of the model to save. It is preferable to use absolute path.
 
@@ -23,21 +111,162 @@ def save_model(filename, format='matlab', verbose=True, **kwargs):
 
     verbose : boolean, True by default
         A variable to enable or disable the printings of this function.
+
+    compression : str, None by default.
+        Compression of the file. Options to use:
+        'gzip' for .gz file
+        'zstd' for .zst file (requires zstandard)
+        The extension is not added to filename. cobra_utils.io.load_model opens the compressed file when filename ends
+        with that extension.
+
+    compression_level : int, None by default.
+        Level of the compression. If None, 9 is used for gzip and 3 for zstd.
+
+    **kwargs : dict
+        Extra arguments passed to the cobra function writing the format.
+
+    Returns
+    -------
+    save_info : dict
+        A dictionary containing the 'Filename', 'Format', 'Compression', 'Bytes' (size of the file) and 'Seconds'
+        (time spent writing and compressing) of the saved model.
     '''
     if verbose:
         print('Saving genome-scale model')
+    if format not in _EXTENSIONS:
+        raise NotImplementedError("Format {} not implemented. Specify a correct format for the model".format(format))
+    if compression is not None and compression not in _COMPRESSION_EXTENSIONS:
+        raise NotImplementedError("Compression {} not implemented. Specify 'gzip' or 'zstd'".format(compression))
+
+    start = time.time()
+    directory = os.path.dirname(os.path.abspath(filename))
+    suffix = _EXTENSIONS[format] + _COMPRESSION_EXTENSIONS.get(compression, '')
+    tmp_filename = _temporary_file(directory, suffix)
+    tmp_uncompressed = None
     try:
-        if format == 'json':
-            model = cobra.io.save_json_model(filename, **kwargs)
-        elif format == 'matlab':
-            model = cobra.io.save_matlab_model(filename, **kwargs)
-        elif format == 'sbml':
-            model = cobra.io.write_sbml_model(filename, **kwargs)
-        elif format == 'yaml':
-            model = cobra.io.save_yaml_model(filename, **kwargs)
-        else:
-            raise NotImplementedError("Format {} not implemented. Specify a correct format for the model".format(format))
-    except:
-        raise ImportError("The file has an incorrect format or does not match with implemented formats")
+        try:
+            if compression is None:
+                _write_model(model, tmp_filename, format, **kwargs)
+            elif format == 'matlab':
+                # .mat files are binary and written by scipy, so they are compressed after writing them
+                fd, tmp_uncompressed = tempfile.mkstemp(dir=directory, prefix='.tmp_', suffix=_EXTENSIONS[format])
+                os.close(fd)
+                _write_model(model, tmp_uncompressed, format, **kwargs)
+                _compress_file(tmp_uncompressed, tmp_filename, compression, compression_level)
+            else:
+                # Text formats are compressed while they are written, without an uncompressed copy on disk
+                with io.TextIOWrapper(_compressed_writer(tmp_filename, compression, compression_level),
+                                      encoding='utf-8') as handle:
+                    _write_model(model, handle, format, **kwargs)
+        except (ImportError, NotImplementedError):
+            raise
+        except Exception as error:
+            raise ImportError("The model could not be saved in {} format: {}".format(format, error))
+
+        _copy_permissions(tmp_filename, filename)
+        os.replace(tmp_filename, filename)
+    finally:
+        for tmp in (tmp_filename, tmp_uncompressed):
+            if tmp is not None and os.path.exists(tmp):
+                os.remove(tmp)
+
+    save_info = {'Filename': filename,
+                 'Format': format,
+                 'Compression': compression,
+                 'Bytes': os.path.getsize(filename),
+                 'Seconds': time.time() - start}
+    if verbose:
+        print('Model correctly saved.')
+    return save_info
+
+
+def _save_model_entry(model_id, model, filename, format, compression, compression_level, kwargs):
+    save_info = save_model(model,
+                           filename,
+                           format=format,
+                           verbose=False,
+                           compression=compression,
+                           compression_level=compression_level,
+                           **kwargs)
+    save_info['ModelID'] = model_id
+    return save_info
+
+
+def save_models(models, output_dir, format='matlab', verbose=True, compression=None, compression_level=None, n_jobs=1,
+                **kwargs):
+    '''
+    This function saves many metabolic reconstructions into a given format, in parallel. Each file is written
+    atomically as in save_model.
+
+    Parameters
+    ----------
+    models : array-like or dict
+        An iterable object containing cobra models. If a dict is passed, the keys are used as ModelIDs. Otherwise,
+        model.id is used.
+
+    output_dir : str
+        Directory where the models are saved. Filenames are the ModelIDs with the extension of the format and the
+        compression (e.g. 'model_1.xml.gz').
+
+    format : str, 'matlab' by default.
+        Format of the files. See save_model for the options.
+
+    verbose : boolean, True by default
+        A variable to enable or disable the printings of this function.
+
+    compression : str, None by default.
+        Compression of the files ('gzip' or 'zstd'). See save_model.
+
+    compression_level : int, None by default.
+        Level of the compression. See save_model.
+
+    n_jobs : int, 1 by default.
+        Number of models saved in parallel, using a process pool. Models are copied to the worker processes.
+
+    **kwargs : dict
+        Extra arguments passed to the cobra function writing the format.
+
+    Returns
+    -------
+    save_info : pandas.DataFrame
+        A dataframe with ModelIDs as index. The columns are :
+        'Filename', 'Format', 'Compression', 'Bytes' (size of the file) and 'Seconds' (time spent writing and
+        compressing the file).
+    '''
+    if isinstance(models, dict):
+        entries = list(models.items())
+    else:
+        entries = [(model.id, model) for model in models]
+    model_ids = [entry[0] for entry in entries]
+    if len(set(model_ids)) != len(model_ids):
+        raise ValueError("Model IDs are duplicated. Pass a dict to assign a unique ID to each model")
+
+    if not os.path.isdir(output_dir):
+        os.makedirs(output_dir)
+    extension = _EXTENSIONS.get(format, '') + _COMPRESSION_EXTENSIONS.get(compression, '')
+    if verbose:
+        print('Saving {} genome-scale models'.format(len(entries)))
+
+    def collect(record):
+        records.append(record)
+        if verbose:
+            print('{} saved'.format(record['Filename']))
+
+    records = []
+    jobs = [(model_id, model, os.path.join(output_dir, str(model_id) + extension), format, compression,
+             compression_level, kwargs) for model_id, model in entries]
+    if n_jobs == 1:
+        for job in jobs:
+            collect(_save_model_entry(*job))
+    else:
+        with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+            futures = [executor.submit(_save_model_entry, *job) for job in jobs]
+            for future in as_completed(futures):
+                collect(future.result())
+
+    save_info = pd.DataFrame.from_records(records, columns=['ModelID', 'Filename', 'Format', 'Compression', 'Bytes',
+                                                           'Seconds'])
+    save_info = save_info.set_index('ModelID').reindex(model_ids)
     if verbose:
-        print('Model correctly saved.')
\ No newline at end of file
+        print('Models correctly saved.')
+    return save_info
@@ -4,4 +4,7 @@ from __future__ import absolute_import
 
 from cobra_utils.query.get_ids import get_gene_ids, get_met_ids, get_rxn_ids
 from cobra_utils.query.rxn_info import rxn_info_from_genes, rxn_info_from_metabolites, rxn_info_from_model, rxn_info_from_reactions
-from cobra_utils.query.met_info import met_info_from_genes, met_info_from_metabolites, met_info_from_model, met_info_from_reactions
\ No newline at end of file
+from cobra_utils.query.met_info import met_info_from_genes, met_info_from_metabolites, met_info_from_model, met_info_from_reactions
+from cobra_utils.query.model_comparison import compare_models
+from cobra_utils.query.gene_mapping import GeneMapper
+from cobra_utils.query.batch_info import ModelAssociations, met_info_from_genes_batch, met_info_from_metabolites_batch, met_info_from_reactions_batch, rxn_info_from_genes_batch, rxn_info_from_metabolites_batch, rxn_info_from_reactions_batch
@@ -0,0 +1,405 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import numpy as np
+import pandas as pd
+
+from cobra_utils.io.arrow_data import dataframe_to_table
+
+import warnings
+
+
+class _PairIndex(object):
+    '''
+    Groups the pairs of an association by one of their sides (key), in a CSR-like structure, to find all the pairs of
+    many keys at once.
+    '''
+    def __init__(self, keys, n_keys):
+        self.order = np.argsort(keys, kind='stable')
+        self.counts = np.bincount(keys, minlength=n_keys)
+        self.starts = np.cumsum(self.counts) - self.counts
+
+    def join(self, positions):
+        '''
+        Returns, for each pair found, the row in positions that generated it and the position of the pair.
+        '''
+        counts = self.counts[positions]
+        rows = np.repeat(np.arange(len(positions)), counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pairs = self.order[np.repeat(self.starts[positions], counts) + offsets]
+        return rows, pairs
+
+
+class ModelAssociations(object):
+    '''
+    This class precomputes the associations between metabolites, reactions and genes of a model as integer arrays,
+    to answer many queries in a single vectorized pass with the *_batch functions. It should be built again if the
+    model is modified.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+    '''
+    def __init__(self, model):
+        self.rxn_ids = pd.Index([rxn.id for rxn in model.reactions])
+        self.met_ids = pd.Index([met.id for met in model.metabolites])
+        self.gene_ids = pd.Index([str(gene.id) for gene in model.genes])
+
+        self.rxn_names = np.array([rxn.name for rxn in model.reactions], dtype=object)
+        self.rxn_subsystems = np.array([rxn.subsystem for rxn in model.reactions], dtype=object)
+        self.rxn_formulas = np.array([rxn.reaction for rxn in model.reactions], dtype=object)
+        self.met_names = np.array([met.name for met in model.metabolites], dtype=object)
+        # Position -1 is used for reactions without genes, with an empty GeneID
+        self.gene_labels = np.append(self.gene_ids.values.astype(object), '')
+
+        met_index = dict((met_id, i) for i, met_id in enumerate(self.met_ids))
+        gene_index = dict((gene_id, i) for i, gene_id in enumerate(self.gene_ids))
+        rxn_gene_rxns = []
+        rxn_gene_genes = []
+        met_rxn_mets = []
+        met_rxn_rxns = []
+        for j, rxn in enumerate(model.reactions):
+            if len(rxn.genes) != 0:
+                for gene in rxn.genes:
+                    rxn_gene_rxns.append(j)
+                    rxn_gene_genes.append(gene_index[str(gene.id)])
+            else:
+                rxn_gene_rxns.append(j)
+                rxn_gene_genes.append(-1)
+            for met in rxn.metabolites:
+                met_rxn_mets.append(met_index[met.id])
+                met_rxn_rxns.append(j)
+
+        self.rxn_gene_rxns = np.array(rxn_gene_rxns, dtype=np.int64)
+        self.rxn_gene_genes = np.array(rxn_gene_genes, dtype=np.int64)
+        self.met_rxn_mets = np.array(met_rxn_mets, dtype=np.int64)
+        self.met_rxn_rxns = np.array(met_rxn_rxns, dtype=np.int64)
+
+        # Pairs grouped by each side. Reactions without genes are not reachable from genes.
+        has_gene = np.flatnonzero(self.rxn_gene_genes >= 0)
+        self._gene_to_rxn = _PairIndex(self.rxn_gene_genes[has_gene], len(self.gene_ids))
+        self._gene_to_rxn.order = has_gene[self._gene_to_rxn.order]
+        self._rxn_to_gene = _PairIndex(self.rxn_gene_rxns, len(self.rxn_ids))
+        self._met_to_rxn = _PairIndex(self.met_rxn_mets, len(self.met_ids))
+        self._rxn_to_met = _PairIndex(self.met_rxn_rxns, len(self.rxn_ids))
+
+    # The following functions return, for an array of positions, the rows of that array with at least one
+    # association and the positions of the associated elements.
+    def genes_to_rxns(self, gene_positions):
+        rows, pairs = self._gene_to_rxn.join(gene_positions)
+        return rows, self.rxn_gene_rxns[pairs]
+
+    def rxns_to_genes(self, rxn_positions):
+        rows, pairs = self._rxn_to_gene.join(rxn_positions)
+        return rows, self.rxn_gene_genes[pairs]
+
+    def mets_to_rxns(self, met_positions):
+        rows, pairs = self._met_to_rxn.join(met_positions)
+        return rows, self.met_rxn_rxns[pairs]
+
+    def rxns_to_mets(self, rxn_positions):
+        rows, pairs = self._rxn_to_met.join(rxn_positions)
+        return rows, self.met_rxn_mets[pairs]
+
+
+def _explode_queries(queries, index, verbose=True):
+    '''
+    Converts a dict of query lists into the arrays of query ids and positions in index, dropping the ids that are not
+    in the model and the ids repeated in the same query.
+    '''
+    query_ids = list(queries.keys())
+    lists = [list(queries[query_id]) for query_id in query_ids]
+    lengths = np.array([len(ids) for ids in lists], dtype=np.int64)
+    query_codes = np.repeat(np.arange(len(query_ids), dtype=np.int64), lengths)
+    ids = [id_ for ids in lists for id_ in ids]
+    positions = index.get_indexer(pd.Index(ids, dtype=object)) if len(ids) != 0 else np.array([], dtype=np.int64)
+
+    found = positions >= 0
+    if verbose and not found.all():
+        excluded = set([ids[i] for i in np.flatnonzero(~found)])
+        warnings.warn('{} are not in the model'.format(excluded))
+    query_codes = query_codes[found]
+    positions = positions[found].astype(np.int64)
+
+    unique = ~pd.Index(query_codes * len(index) + positions).duplicated(keep='first')
+    return np.array(query_ids, dtype=object), query_codes[unique], positions[unique]
+
+
+def _build_table(columns, output='pandas'):
+    table = pd.DataFrame(columns)
+    if output == 'arrow':
+        table = dataframe_to_table(table)
+    elif output != 'pandas':
+        raise NotImplementedError("Output {} not implemented. Specify 'pandas' or 'arrow'".format(output))
+    return table
+
+
+def rxn_info_from_genes_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of rxn_info_from_genes. It looks for all the reactions associated to many lists
+    of gene ids at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of gene ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'GeneID', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula'
+    '''
+    if associations is None:
+        associations = ModelAssociations(model)
+    query_ids, query_codes, gene_pos = _explode_queries(queries, associations.gene_ids, verbose=verbose)
+
+    rows, rxn_pos = associations.genes_to_rxns(gene_pos)
+    a = associations
+    return _build_table({'QueryID': query_ids[query_codes[rows]],
+                         'GeneID': a.gene_labels[gene_pos[rows]],
+                         'RxnID': a.rxn_ids.values[rxn_pos],
+                         'RxnName': a.rxn_names[rxn_pos],
+                         'SubSystem': a.rxn_subsystems[rxn_pos],
+                         'RxnFormula': a.rxn_formulas[rxn_pos]},
+                        output=output)
+
+
+def rxn_info_from_reactions_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of rxn_info_from_reactions. It looks for the information and genes associated
+    to many lists of reaction ids at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of reaction ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'RxnID', 'RxnName', 'GeneID', 'SubSystem', 'RxnFormula'
+    '''
+    if associations is None:
+        associations = ModelAssociations(model)
+    query_ids, query_codes, rxn_pos = _explode_queries(queries, associations.rxn_ids, verbose=verbose)
+
+    rows, gene_pos = associations.rxns_to_genes(rxn_pos)
+    rxn_pos = rxn_pos[rows]
+    a = associations
+    return _build_table({'QueryID': query_ids[query_codes[rows]],
+                         'RxnID': a.rxn_ids.values[rxn_pos],
+                         'RxnName': a.rxn_names[rxn_pos],
+                         'GeneID': a.gene_labels[gene_pos],
+                         'SubSystem': a.rxn_subsystems[rxn_pos],
+                         'RxnFormula': a.rxn_formulas[rxn_pos]},
+                        output=output)
+
+
+def rxn_info_from_metabolites_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of rxn_info_from_metabolites. It looks for all the reactions where the
+    metabolites of many lists participate, and the genes of those reactions, at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of metabolite ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula'
+    '''
+    if associations is None:
+        associations = ModelAssociations(model)
+    query_ids, query_codes, met_pos = _explode_queries(queries, associations.met_ids, verbose=verbose)
+
+    met_rows, rxn_pos = associations.mets_to_rxns(met_pos)
+    rows, gene_pos = associations.rxns_to_genes(rxn_pos)
+    met_rows = met_rows[rows]
+    rxn_pos = rxn_pos[rows]
+    a = associations
+    return _build_table({'QueryID': query_ids[query_codes[met_rows]],
+                         'MetID': a.met_ids.values[met_pos[met_rows]],
+                         'MetName': a.met_names[met_pos[met_rows]],
+                         'RxnID': a.rxn_ids.values[rxn_pos],
+                         'RxnName': a.rxn_names[rxn_pos],
+                         'GeneID': a.gene_labels[gene_pos],
+                         'Subsystem': a.rxn_subsystems[rxn_pos],
+                         'RxnFormula': a.rxn_formulas[rxn_pos]},
+                        output=output)
+
+
+def met_info_from_metabolites_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of met_info_from_metabolites. It looks for the reactions and genes associated
+    to many lists of metabolite ids at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of metabolite ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula'
+    '''
+    return rxn_info_from_metabolites_batch(model, queries, associations=associations, verbose=verbose, output=output)
+
+
+def met_info_from_reactions_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of met_info_from_reactions. It looks for all the metabolites and genes
+    involved in many lists of reaction ids at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of reaction ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'RxnID', 'RxnName', 'MetID', 'MetName', 'GeneID', 'Subsystem', 'RxnFormula'
+    '''
+    if associations is None:
+        associations = ModelAssociations(model)
+    query_ids, query_codes, rxn_pos = _explode_queries(queries, associations.rxn_ids, verbose=verbose)
+
+    rxn_rows, met_pos = associations.rxns_to_mets(rxn_pos)
+    rows, gene_pos = associations.rxns_to_genes(rxn_pos[rxn_rows])
+    rxn_rows = rxn_rows[rows]
+    met_pos = met_pos[rows]
+    rxn_pos = rxn_pos[rxn_rows]
+    a = associations
+    return _build_table({'QueryID': query_ids[query_codes[rxn_rows]],
+                         'RxnID': a.rxn_ids.values[rxn_pos],
+                         'RxnName': a.rxn_names[rxn_pos],
+                         'MetID': a.met_ids.values[met_pos],
+                         'MetName': a.met_names[met_pos],
+                         'GeneID': a.gene_labels[gene_pos],
+                         'Subsystem': a.rxn_subsystems[rxn_pos],
+                         'RxnFormula': a.rxn_formulas[rxn_pos]},
+                        output=output)
+
+
+def met_info_from_genes_batch(model, queries, associations=None, verbose=True, output='pandas'):
+    '''
+    This function is the batch version of met_info_from_genes. It looks for all the metabolites involved in
+    reactions that are associated to many lists of gene ids at once.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    queries : dict
+        A dictionary where the keys are query ids and the values lists of gene ids.
+
+    associations : cobra_utils.query.ModelAssociations, None by default.
+        The precomputed associations of the model. If None, they are computed. Passing them avoids recomputing them in
+        every call.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table (See cobra_utils.io.arrow_data).
+
+    Returns
+    -------
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
+        'QueryID', 'GeneID', 'MetID', 'MetName', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula'
+    '''
+    if associations is None:
+        associations = ModelAssociations(model)
+    query_ids, query_codes, gene_pos = _explode_queries(queries, associations.gene_ids, verbose=verbose)
+
+    gene_rows, rxn_pos = associations.genes_to_rxns(gene_pos)
+    rows, met_pos = associations.rxns_to_mets(rxn_pos)
+    gene_rows = gene_rows[rows]
+    rxn_pos = rxn_pos[rows]
+    a = associations
+    return _build_table({'QueryID': query_ids[query_codes[gene_rows]],
+                         'GeneID': a.gene_labels[gene_pos[gene_rows]],
+                         'MetID': a.met_ids.values[met_pos],
+                         'MetName': a.met_names[met_pos],
+                         'RxnID': a.rxn_ids.values[rxn_pos],
+                         'RxnName': a.rxn_names[rxn_pos],
+                         'SubSystem': a.rxn_subsystems[rxn_pos],
+                         'RxnFormula': a.rxn_formulas[rxn_pos]},
+                        output=output)
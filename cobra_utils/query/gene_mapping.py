@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import numpy as np
+import pandas as pd
+
+import warnings
+
+
+def _strip(ids):
+    return ids.str.strip()
+
+
+def _lower(ids):
+    return ids.str.lower()
+
+
+def _version(ids):
+    return ids.str.replace(r'\.\d+$', '', regex=True)
+
+
+_NORMALIZATION_RULES = {'strip': _strip,
+                        'lower': _lower,
+                        'version': _version}
+
+
+class GeneMapper(object):
+    '''
+    This class builds a hashed lookup of the gene ids in a model to resolve external gene ids (e.g. the index of a
+    p-value table) into integer positions of the model genes in a single vectorized step.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model or array-like
+        A cobra model, or a list of its gene ids.
+
+    normalize : array-like or callable, None by default.
+        Rules applied to both the model gene ids and the ids to resolve before matching them. Options to use:
+        'strip' to remove leading and trailing whitespaces
+        'lower' to ignore case differences
+        'version' to remove version suffixes (e.g. ENSG00000141510.16 -> ENSG00000141510)
+        A callable receiving a pandas.Index of str and returning a normalized pandas.Index.
+        If None, ids are matched exactly.
+
+    aliases : dict or pandas.Series, None by default.
+        A mapping from alternative ids (e.g. gene names) to model gene ids. Model gene ids take precedence over aliases.
+
+    Attributes
+    ----------
+    gene_ids : pandas.Index
+        The model gene ids. Resolved positions refer to this index.
+    '''
+    def __init__(self, model, normalize=None, aliases=None):
+        if hasattr(model, 'genes'):
+            gene_ids = [gene.id for gene in model.genes]
+        else:
+            gene_ids = list(model)
+        self.gene_ids = pd.Index(gene_ids).astype(str)
+        if not self.gene_ids.is_unique:
+            raise ValueError('Model gene ids must be unique')
+
+        if normalize is None:
+            self._rules = []
+        elif callable(normalize):
+            self._rules = [normalize]
+        else:
+            if isinstance(normalize, str):
+                normalize = [normalize]
+            self._rules = []
+            for rule in normalize:
+                if rule not in _NORMALIZATION_RULES:
+                    raise NotImplementedError("Normalization rule {} not implemented. Use one of {}".format(rule,
+                                                                                                     list(_NORMALIZATION_RULES)))
+                self._rules.append(_NORMALIZATION_RULES[rule])
+
+        keys = self.normalize(self.gene_ids)
+        targets = np.arange(len(self.gene_ids))
+        if aliases is not None:
+            aliases = pd.Series(aliases)
+            alias_targets = self.gene_ids.get_indexer(aliases.astype(str).values)
+            valid = alias_targets >= 0
+            if not valid.all():
+                warnings.warn('{} aliases point to genes that are not in the model'.format(int((~valid).sum())))
+            keys = keys.append(self.normalize(pd.Index(aliases.index[valid]).astype(str)))
+            targets = np.concatenate([targets, alias_targets[valid]])
+
+        # Keep the first target of each key, so model ids take precedence over aliases
+        first = ~keys.duplicated(keep='first')
+        if not first[:len(self.gene_ids)].all():
+            warnings.warn('{} model gene ids are ambiguous after normalization. Only the first one is '
+                          'used'.format(int((~first[:len(self.gene_ids)]).sum())))
+        self._keys = keys[first]
+        self._targets = targets[first]
+
+    def normalize(self, ids):
+        '''
+        This function applies the normalization rules to a list of ids.
+
+        Parameters
+        ----------
+        ids : array-like
+            An iterable object containing ids.
+
+        Returns
+        -------
+        normalized_ids : pandas.Index
+            The normalized ids, as str.
+        '''
+        ids = pd.Index(ids).astype(str)
+        for rule in self._rules:
+            ids = pd.Index(rule(ids))
+        return ids
+
+    def resolve(self, ids, verbose=False):
+        '''
+        This function resolves a list of ids into the positions of the respective model genes.
+
+        Parameters
+        ----------
+        ids : array-like
+            An iterable object containing ids, such as the index of a p-value dataframe.
+
+        verbose : boolean, False by default.
+            A variable to warn about the ids that are not in the model.
+
+        Returns
+        -------
+        positions : numpy.ndarray
+            An array of int with the position in gene_ids of the gene matching each id, or -1 when there is no match.
+
+        unmatched : list
+            A list containing the ids that do not match any model gene.
+        '''
+        ids = pd.Index(ids)
+        indexer = self._keys.get_indexer(self.normalize(ids))
+        positions = np.where(indexer >= 0, self._targets[indexer], -1)
+        unmatched = list(ids[positions < 0])
+        if verbose and len(unmatched) > 0:
+            warnings.warn('{} ids are not in the model, e.g. {}'.format(len(unmatched), unmatched[:5]))
+        return positions, unmatched
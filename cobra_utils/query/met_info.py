@@ -2,13 +2,13 @@
 
 from __future__ import absolute_import
 
-import pandas as pd
+from cobra_utils.io.arrow_data import records_to_table
 from cobra_utils.query import get_ids
 
 import warnings
 
 
-def met_info_from_metabolites(model, metabolites, verbose=True):
+def met_info_from_metabolites(model, metabolites, verbose=True, output='pandas'):
     '''
     This function looks for all the metabolites in a list and find their reaction association. Also, it retrieves the genes
     associated to those reactions.
@@ -24,10 +24,14 @@ def met_info_from_metabolites(model, metabolites, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    met_rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula'
     '''
     if verbose:
@@ -49,13 +53,13 @@ def met_info_from_metabolites(model, metabolites, verbose=True):
                 met_rxn_gene_association.append((met.id, met.name, rxn.id, rxn.name, '', rxn.subsystem, rxn.reaction))
 
     labels = ['MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula']
-    met_rxn_gene_association = pd.DataFrame.from_records(met_rxn_gene_association, columns=labels)
+    met_rxn_gene_association = records_to_table(met_rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return met_rxn_gene_association
 
 
-def met_info_from_reactions(model, reactions, verbose=True):
+def met_info_from_reactions(model, reactions, verbose=True, output='pandas'):
     '''
     This function looks for all the metabolites involved in reactions that are in a list.
 
@@ -70,10 +74,14 @@ def met_info_from_reactions(model, reactions, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    met_rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'RxnID', 'RxnName', 'MetID', 'MetName', 'GeneID', 'Subsystem', 'RxnFormula'
     '''
     if verbose:
@@ -94,13 +102,13 @@ def met_info_from_reactions(model, reactions, verbose=True):
             else:
                 met_rxn_gene_association.append((rxn.id, rxn.name, met.id, met.name,  '', rxn.subsystem, rxn.reaction))
     labels = ['RxnID', 'RxnName', 'MetID', 'MetName', 'GeneID', 'Subsystem', 'RxnFormula']
-    met_rxn_gene_association = pd.DataFrame.from_records(met_rxn_gene_association, columns=labels)
+    met_rxn_gene_association = records_to_table(met_rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return met_rxn_gene_association
 
 
-def met_info_from_genes(model, genes, verbose=True):
+def met_info_from_genes(model, genes, verbose=True, output='pandas'):
     '''
     This function looks for all the metabolites involved in reactions that are associated to a list of gene ids.
 
@@ -115,10 +123,14 @@ def met_info_from_genes(model, genes, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    met_rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'GeneID', 'MetID', 'MetName', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula'
     '''
     if verbose:
@@ -136,13 +148,13 @@ def met_info_from_genes(model, genes, verbose=True):
             for met in rxn.metabolites:
                 met_rxn_gene_association.append((str(g.id), met.id, met.name, rxn.id, rxn.name, rxn.subsystem, rxn.reaction))
     labels = ['GeneID', 'MetID', 'MetName', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula']
-    met_rxn_gene_association = pd.DataFrame.from_records(met_rxn_gene_association, columns=labels)
+    met_rxn_gene_association = records_to_table(met_rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return met_rxn_gene_association
 
 
-def met_info_from_model(model, verbose=True):
+def met_info_from_model(model, verbose=True, output='pandas'):
     '''
     This function looks for all the metabolites in the model and returns their respective information.
 
@@ -154,10 +166,14 @@ def met_info_from_model(model, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    met_rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    met_rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'MetID', 'MetName', 'GeneID', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula'
     '''
     if verbose:
@@ -172,7 +188,7 @@ def met_info_from_model(model, verbose=True):
             else:
                 met_association.append((met.id, met.name,  '', rxn.id, rxn.name, rxn.subsystem, rxn.reaction))
     labels = ['MetID', 'MetName', 'GeneID', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula']
-    met_association = pd.DataFrame.from_records(met_association, columns=labels)
+    met_association = records_to_table(met_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return met_association
\ No newline at end of file
@@ -0,0 +1,170 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import os
+
+import cobra
+import numpy as np
+import pandas as pd
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from pandas.api.types import union_categoricals
+
+from cobra_utils.io import load_model
+from cobra_utils.query import get_ids
+from cobra_utils.query.met_info import met_info_from_model
+from cobra_utils.query.rxn_info import rxn_info_from_model
+
+
+_ID_GETTERS = {'reactions': get_ids.get_rxn_ids,
+               'genes': get_ids.get_gene_ids,
+               'metabolites': get_ids.get_met_ids}
+
+
+def _model_id_from_path(filename):
+    '''
+    Builds a model id from a filename, removing the directory and the extensions (including compression ones).
+    '''
+    name = os.path.basename(str(filename))
+    for compression in ('.gz', '.bz2', '.xz', '.zip', '.zst'):
+        if name.endswith(compression):
+            name = name[:-len(compression)]
+    return os.path.splitext(name)[0]
+
+
+def _model_entries(models):
+    '''
+    Returns a list of (ModelID, model or path) tuples from a list or a dict of models.
+    '''
+    if isinstance(models, dict):
+        entries = list(models.items())
+    else:
+        entries = []
+        for model in models:
+            if isinstance(model, (str, os.PathLike)):
+                entries.append((_model_id_from_path(model), model))
+            else:
+                entries.append((model.id, model))
+
+    model_ids = [entry[0] for entry in entries]
+    if len(set(model_ids)) != len(model_ids):
+        duplicated = set([model_id for model_id in model_ids if model_ids.count(model_id) > 1])
+        raise ValueError("Model IDs {} are duplicated. Pass a dict to assign a unique ID to each model".format(duplicated))
+    return entries
+
+
+def _model_summary(model, format='sbml', long_table=False):
+    '''
+    Loads a model when a path is given and gets the IDs of its reactions, genes and metabolites. Optionally, it also
+    returns the tables from rxn_info_from_model and met_info_from_model, with categorical columns so that workers
+    return (and pickle) each repeated text only once. This is the unit of work run by each worker.
+    '''
+    if isinstance(model, (str, os.PathLike)):
+        model = load_model(str(model), format=format, verbose=False)
+
+    ids = dict()
+    for key, getter in _ID_GETTERS.items():
+        ids[key] = getter(model)
+
+    tables = dict()
+    if long_table:
+        tables['rxn_info'] = rxn_info_from_model(model, verbose=False).astype('category')
+        tables['met_info'] = met_info_from_model(model, verbose=False).astype('category')
+    return ids, tables
+
+
+def compare_models(models, format='sbml', n_jobs=1, long_table=False, verbose=True):
+    '''
+    This function compares the reactions, genes and metabolites present in a collection of models (e.g. strain-specific
+    reconstructions) and returns presence/absence matrices for each of them.
+
+    Parameters
+    ----------
+    models : array-like or dict
+        An iterable object containing cobra models or paths to their files. Paths are loaded lazily with
+        cobra_utils.io.load_model, inside the workers when n_jobs > 1. If a dict is passed, the keys are used as
+        ModelIDs. Otherwise, the model.id or the filename without extensions is used.
+
+    format : str, 'sbml' by default.
+        Format of the files containing the models. Only used for models passed as paths.
+        See cobra_utils.io.load_model for the options.
+
+    n_jobs : int, 1 by default.
+        Number of models processed in parallel. When any model is given as a path, a process pool is used; otherwise a
+        thread pool is used to avoid copying the models.
+
+    long_table : boolean, False by default.
+        A variable to include the outputs of query.rxn_info_from_model and query.met_info_from_model for all the models
+        in long format, with an additional 'ModelID' column. Text columns are stored as categorical.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    Returns
+    -------
+    comparison : dict
+        A dictionary containing a boolean pandas.DataFrame for each of 'reactions', 'genes' and 'metabolites', where
+        rows are the IDs present in at least one model and columns are the ModelIDs. If long_table is True, it also
+        contains the 'rxn_info' and 'met_info' tables.
+    '''
+    entries = _model_entries(models)
+    model_ids = [entry[0] for entry in entries]
+    if verbose:
+        print('Comparing {} models'.format(len(entries)))
+
+    # IDs are stored only once; each model keeps the integer codes of the IDs it contains.
+    id_codes = {key: dict() for key in _ID_GETTERS.keys()}
+    model_codes = {key: dict() for key in _ID_GETTERS.keys()}
+    tables = {'rxn_info': dict(), 'met_info': dict()}
+
+    def collect(model_id, summary):
+        ids, model_tables = summary
+        for key, model_ids_ in ids.items():
+            codes = id_codes[key]
+            model_codes[key][model_id] = np.fromiter((codes.setdefault(id_, len(codes)) for id_ in model_ids_),
+                                                     dtype=np.int64,
+                                                     count=len(model_ids_))
+        for key, table in model_tables.items():
+            tables[key][model_id] = table
+        if verbose:
+            print('{} processed'.format(model_id))
+
+    if n_jobs == 1:
+        for model_id, model in entries:
+            collect(model_id, _model_summary(model, format=format, long_table=long_table))
+    else:
+        use_processes = any(isinstance(model, (str, os.PathLike)) for _, model in entries)
+        pool = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool(max_workers=n_jobs) as executor:
+            futures = {executor.submit(_model_summary, model, format, long_table): model_id
+                       for model_id, model in entries}
+            for future in as_completed(futures):
+                collect(futures[future], future.result())
+
+    comparison = dict()
+    for key in _ID_GETTERS.keys():
+        codes = id_codes[key]
+        presence = np.zeros((len(codes), len(model_ids)), dtype=bool)
+        for j, model_id in enumerate(model_ids):
+            presence[model_codes[key][model_id], j] = True
+        presence = pd.DataFrame(presence, index=list(codes.keys()), columns=model_ids)
+        comparison[key] = presence.sort_index()
+
+    if long_table:
+        for key, model_tables in tables.items():
+            model_tables = [model_tables[model_id] for model_id in model_ids]
+            if len(model_tables) == 0:
+                # Without models, the table of an empty model keeps the columns of the long table
+                model_tables = [_model_summary(cobra.Model(), long_table=True)[1][key]]
+            lengths = [len(table) for table in model_tables]
+            # Categorical columns are combined through their codes, without building the text of all models at once
+            table = {'ModelID': pd.Categorical.from_codes(np.repeat(np.arange(len(model_ids)), lengths),
+                                                          categories=model_ids)}
+            for col in model_tables[0].columns:
+                table[col] = union_categoricals([model_table[col] for model_table in model_tables])
+            comparison[key] = pd.DataFrame(table)
+
+    if verbose:
+        print('Comparison correctly obtained.')
+    return comparison
@@ -2,13 +2,13 @@
 
 from __future__ import absolute_import
 
-import pandas as pd
+from cobra_utils.io.arrow_data import records_to_table
 from cobra_utils.query import get_ids
 
 import warnings
 
 
-def rxn_info_from_metabolites(model, metabolites, verbose=True):
+def rxn_info_from_metabolites(model, metabolites, verbose=True, output='pandas'):
     '''
     This function looks for all the reactions where the metabolites in the list participate. Also, it retrieves the genes
     associated to those reactions.
@@ -24,10 +24,14 @@ def rxn_info_from_metabolites(model, metabolites, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula'
     '''
     if verbose:
@@ -51,13 +55,13 @@ def rxn_info_from_metabolites(model, metabolites, verbose=True):
                     (met.id, met.name, rxn.id, rxn.name, '', rxn.subsystem, rxn.reaction))
 
     labels = ['MetID', 'MetName', 'RxnID', 'RxnName', 'GeneID', 'Subsystem', 'RxnFormula']
-    rxn_gene_association = pd.DataFrame.from_records(rxn_gene_association, columns=labels)
+    rxn_gene_association = records_to_table(rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return rxn_gene_association
 
 
-def rxn_info_from_reactions(model, reactions, verbose=True):
+def rxn_info_from_reactions(model, reactions, verbose=True, output='pandas'):
     '''
     This function looks for all the reactions and genes that are associated from a list of reactions ids.
 
@@ -72,10 +76,14 @@ def rxn_info_from_reactions(model, reactions, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'RxnID', 'RxnName', 'GeneID', 'SubSystem', 'RxnFormula'
     '''
     if verbose:
@@ -95,13 +103,13 @@ def rxn_info_from_reactions(model, reactions, verbose=True):
         else:
             rxn_gene_association.append((rxn.id, rxn.name, '', rxn.subsystem, rxn.reaction))
     labels = ['RxnID', 'RxnName', 'GeneID', 'SubSystem', 'RxnFormula']
-    rxn_gene_association = pd.DataFrame.from_records(rxn_gene_association, columns=labels)
+    rxn_gene_association = records_to_table(rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return rxn_gene_association
 
 
-def rxn_info_from_genes(model, genes, verbose=True):
+def rxn_info_from_genes(model, genes, verbose=True, output='pandas'):
     '''
     This function looks for all the reactions and genes that are associated from a list of gene ids.
 
@@ -116,10 +124,14 @@ def rxn_info_from_genes(model, genes, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'GeneID', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula'
     '''
     if verbose:
@@ -136,13 +148,13 @@ def rxn_info_from_genes(model, genes, verbose=True):
         for rxn in g.reactions:
                 rxn_gene_association.append((str(g.id), rxn.id, rxn.name, rxn.subsystem, rxn.reaction))
     labels = ['GeneID', 'RxnID', 'RxnName', 'SubSystem', 'RxnFormula']
-    rxn_gene_association = pd.DataFrame.from_records(rxn_gene_association, columns=labels)
+    rxn_gene_association = records_to_table(rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return rxn_gene_association
 
 
-def rxn_info_from_model(model, verbose=True):
+def rxn_info_from_model(model, verbose=True, output='pandas'):
     '''
     This function looks for all the reactions in the model and returns their respective information.
 
@@ -154,10 +166,14 @@ def rxn_info_from_model(model, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table with dictionary-encoded ID, name and subsystem
+        columns (See cobra_utils.io.arrow_data).
+
     Returns
     -------
-    rxn_gene_association : pandas.DataFrame
-        A pandas dataframe containing the information retrieved. The columns are :
+    rxn_gene_association : pandas.DataFrame or pyarrow.Table
+        A table containing the information retrieved. The columns are :
         'RxnID', 'RxnName', 'GeneID', 'SubSystem', 'RxnFormula'
     '''
     if verbose:
@@ -171,7 +187,7 @@ def rxn_info_from_model(model, verbose=True):
         else:
             rxn_gene_association.append((rxn.id, rxn.name, '', rxn.subsystem, rxn.reaction))
     labels = ['RxnID', 'RxnName', 'GeneID', 'SubSystem', 'RxnFormula']
-    rxn_gene_association = pd.DataFrame.from_records(rxn_gene_association, columns=labels)
+    rxn_gene_association = records_to_table(rxn_gene_association, labels, output=output)
     if verbose:
         print('Information correctly obtained.')
     return rxn_gene_association
\ No newline at end of file
@@ -3,4 +3,8 @@
 from __future__ import absolute_import
 
 from cobra_utils.topology.reporter_metabolites import reporter_metabolites
-from cobra_utils.topology.reporter_pathways import reporter_pathways
\ No newline at end of file
+from cobra_utils.topology.reporter_pathways import reporter_pathways
+from cobra_utils.topology.network_stats import met_network_stats
+from cobra_utils.topology.profiling import StageProfiler
+from cobra_utils.topology.scoring import adjust_p_values, z_to_p_values
+from cobra_utils.topology.background import background_z_stats, clear_background_cache
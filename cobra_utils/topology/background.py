@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import hashlib
+import os
+import tempfile
+import threading
+
+import numpy as np
+import pandas as pd
+
+from collections import OrderedDict
+
+
+# Statistics of the most recently used keys (background Z-scores, n_samples and seed), least recently used first
+_BACKGROUND_CACHE = OrderedDict()
+_BACKGROUND_CACHE_SIZE = 32
+_BACKGROUND_CACHE_LOCK = threading.Lock()
+
+
+def _background_key(background_Z, n_samples, seed):
+    digest = hashlib.sha1(np.ascontiguousarray(background_Z, dtype=np.float64).tobytes())
+    digest.update('n_samples={};seed={}'.format(n_samples, seed).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _cached_stats(key):
+    with _BACKGROUND_CACHE_LOCK:
+        cached = _BACKGROUND_CACHE.pop(key, dict())
+        _BACKGROUND_CACHE[key] = cached
+        while len(_BACKGROUND_CACHE) > _BACKGROUND_CACHE_SIZE:
+            _BACKGROUND_CACHE.popitem(last=False)
+    return cached
+
+
+def _read_cache_file(filename):
+    stats = pd.read_csv(filename, index_col=0, float_precision='round_trip')
+    return dict((int(size), (row['Mean-Z'], row['Std-Z'])) for size, row in stats.iterrows())
+
+
+def _write_cache_file(filename, cached):
+    stats = pd.DataFrame.from_dict(cached, orient='index', columns=['Mean-Z', 'Std-Z']).sort_index()
+    stats.index.name = 'Size'
+    # Write into a temporary file first, so other processes never read a partial file
+    fd, tmp_filename = tempfile.mkstemp(dir=os.path.dirname(filename), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            stats.to_csv(f, float_format='%.17g')
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.remove(tmp_filename)
+        raise
+
+
+def clear_background_cache():
+    '''
+    This function removes all the background statistics kept in memory by background_z_stats.
+    '''
+    with _BACKGROUND_CACHE_LOCK:
+        _BACKGROUND_CACHE.clear()
+
+
+def background_z_stats(background_Z, sizes, n_samples=100000, seed=None, cache=True, cache_dir=None):
+    '''
+    This function computes the mean and std of the aggregate Z-score (sum / sqrt(size)) of random gene sets of each
+    size, sampled with replacement from the background Z-scores.
+
+    These statistics only depend on the background Z-scores, the set size, n_samples and seed, so when a seed is given
+    they are cached using a hash of them as key. Analyses of the same expression data against different models or
+    pathway definitions then skip the sampling of the sizes already computed.
+
+    Parameters
+    ----------
+    background_Z : array-like
+        An array with the Z-scores from which the random sets are sampled.
+
+    sizes : array-like
+        An array or list containing the sizes (int) of the gene sets.
+
+    n_samples : int, 100000 by default.
+        Number of random sets sampled for each size.
+
+    seed : int, None by default.
+        Seed of the random sets. Each size uses its own random generator seeded with (seed, size), so results do not
+        depend on the other sizes computed. If None, numpy's global random generator is used and the statistics are
+        not cached, so each call draws new random sets.
+
+    cache : boolean, True by default.
+        A variable to keep the statistics in memory and reuse them in later calls. Only used when seed is not None.
+        The statistics of the 32 most recently used background Z-scores, n_samples and seed are kept.
+
+    cache_dir : str, None by default.
+        A directory where the statistics are also stored as csv files, to reuse them across runs and processes.
+        Only used when cache is True and seed is not None.
+
+    Returns
+    -------
+    bg_stats : pandas.DataFrame
+        A dataframe with the sizes as index and the 'Mean-Z' and 'Std-Z' of the random sets as columns.
+    '''
+    background_Z = np.asarray(background_Z, dtype=np.float64).flatten()
+    background_Z = background_Z[~np.isnan(background_Z)]
+    sizes = [int(size) for size in pd.unique(np.asarray(sizes))]
+
+    cached = dict()
+    filename = None
+    if cache and seed is not None:
+        key = _background_key(background_Z, n_samples, seed)
+        cached = _cached_stats(key)
+        if cache_dir is not None:
+            filename = os.path.join(cache_dir, 'background_{}.csv'.format(key))
+            if any(size not in cached for size in sizes) and os.path.exists(filename):
+                for size, values in _read_cache_file(filename).items():
+                    cached.setdefault(size, values)
+
+    missing = [size for size in sizes if size not in cached]
+    for size in missing:
+        if seed is None:
+            rng = np.random
+        else:
+            rng = np.random.RandomState([seed, size])
+        # Accumulate one gene per set at a time, so memory does not grow with the set size
+        bg_Z = np.zeros(n_samples)
+        for j in range(size):
+            bg_Z += background_Z[rng.randint(0, len(background_Z), size=n_samples)]
+        bg_Z /= np.sqrt(size)
+        cached[size] = (np.mean(bg_Z), np.std(bg_Z))
+
+    if filename is not None and len(missing) > 0:
+        if not os.path.isdir(cache_dir):
+            os.makedirs(cache_dir)
+        # Merge with the sizes that other processes may have written meanwhile
+        if os.path.exists(filename):
+            for size, values in _read_cache_file(filename).items():
+                cached.setdefault(size, values)
+        _write_cache_file(filename, cached)
+
+    bg_stats = pd.DataFrame([cached[size] for size in sizes], index=sizes, columns=['Mean-Z', 'Std-Z'])
+    bg_stats.index.name = 'Size'
+    return bg_stats
@@ -0,0 +1,69 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+
+
+def met_network_stats(model, verbose=True):
+    '''
+    This function computes network statistics for each metabolite from the metabolite-reaction and reaction-gene
+    incidence structure of the model. It is useful to identify hub (currency) metabolites, such as h2o, atp or h,
+    and it can be computed once per model and reused in reporter_metabolites.
+
+    Parameters
+    ----------
+    model : cobra.core.Model.Model
+        A cobra model.
+
+    verbose : boolean, True by default.
+        A variable to enable or disable the printings of this function.
+
+    Returns
+    -------
+    met_stats : pandas.DataFrame
+        A dataframe with metabolite ids as index. The columns are :
+        'MetName', 'Compartment', 'Degree' (number of reactions where the metabolite participates), 'Genes-Number'
+        (number of genes associated to those reactions) and 'Degree-Percentile' (percentile of the degree among all
+        metabolites, between 0 and 100).
+    '''
+    if verbose:
+        print('Computing network statistics for all metabolites in the model.')
+
+    met_index = dict((met.id, i) for i, met in enumerate(model.metabolites))
+    gene_index = dict((gene.id, i) for i, gene in enumerate(model.genes))
+
+    met_rows = []
+    met_cols = []
+    gene_rows = []
+    gene_cols = []
+    for j, rxn in enumerate(model.reactions):
+        for met in rxn.metabolites:
+            met_rows.append(met_index[met.id])
+            met_cols.append(j)
+        for gene in rxn.genes:
+            gene_rows.append(j)
+            gene_cols.append(gene_index[gene.id])
+
+    n_mets = len(met_index)
+    n_rxns = len(model.reactions)
+    met_rxn = sparse.csr_matrix((np.ones(len(met_rows), dtype=np.int32), (met_rows, met_cols)),
+                                shape=(n_mets, n_rxns))
+    rxn_gene = sparse.csr_matrix((np.ones(len(gene_rows), dtype=np.int32), (gene_rows, gene_cols)),
+                                 shape=(n_rxns, len(gene_index)))
+
+    degree = np.asarray(met_rxn.sum(axis=1)).flatten()
+    met_gene = met_rxn.dot(rxn_gene)
+    genes_number = np.diff(met_gene.indptr)
+
+    met_stats = pd.DataFrame({'MetName': [met.name for met in model.metabolites],
+                              'Compartment': [met.compartment for met in model.metabolites],
+                              'Degree': degree,
+                              'Genes-Number': genes_number},
+                             index=list(met_index.keys()))
+    met_stats['Degree-Percentile'] = met_stats['Degree'].rank(method='max', pct=True) * 100.0
+    if verbose:
+        print('Network statistics correctly obtained.')
+    return met_stats
@@ -0,0 +1,182 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import cProfile
+import io
+import pstats
+import threading
+import time
+import tracemalloc
+
+import pandas as pd
+
+from contextlib import contextmanager
+
+
+# tracemalloc is global to the process, so stages running at the same time (e.g. in threads) share it. The first
+# stage starts tracing (unless it was already started outside) and the last one stops it.
+_TRACING_LOCK = threading.Lock()
+_ACTIVE_STAGES = [0, False]  # [number of active stages, whether tracing was started by them]
+
+
+def _start_tracing():
+    with _TRACING_LOCK:
+        if _ACTIVE_STAGES[0] == 0:
+            _ACTIVE_STAGES[1] = not tracemalloc.is_tracing()
+            if _ACTIVE_STAGES[1]:
+                tracemalloc.start()
+            else:
+                tracemalloc.reset_peak()
+        _ACTIVE_STAGES[0] += 1
+        return _ACTIVE_STAGES[0] == 1
+
+
+def _stop_tracing():
+    with _TRACING_LOCK:
+        _ACTIVE_STAGES[0] -= 1
+        if _ACTIVE_STAGES[0] == 0 and _ACTIVE_STAGES[1]:
+            tracemalloc.stop()
+            _ACTIVE_STAGES[1] = False
+
+
+class StageProfiler(object):
+    '''
+    This class measures the time, the CPU profile (cProfile) and the memory allocations (tracemalloc) of the stages of
+    an analysis. When it is disabled, stages are not measured and have no overhead.
+
+    tracemalloc is global to the process, so memory figures include allocations made by other threads running at the
+    same time. The peak memory of a stage is only reported when no other stage was running when it started, since the
+    peak cannot be reset without losing the peak of the other stages; otherwise it is NaN.
+
+    Parameters
+    ----------
+    enabled : boolean, True by default.
+        A variable to enable or disable the measurements.
+
+    n_top : int, 10 by default.
+        Number of functions (sorted by cumulative time) and allocation sites (sorted by size) reported per stage.
+    '''
+    def __init__(self, enabled=True, n_top=10):
+        self.enabled = enabled
+        self.n_top = n_top
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        '''
+        Context manager measuring the code run inside it as a stage called name.
+        '''
+        if not self.enabled:
+            yield
+            return
+
+        own_peak = _start_tracing()
+        try:
+            snapshot = self._snapshot()
+            start_memory = tracemalloc.get_traced_memory()[0]
+        except BaseException:
+            _stop_tracing()
+            raise
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is active (e.g. an outer cProfile run)
+            profiler = None
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            if profiler is not None:
+                profiler.disable()
+            try:
+                current_memory, peak_memory = tracemalloc.get_traced_memory()
+                top_allocations = self._snapshot().compare_to(snapshot, 'lineno')[:self.n_top]
+            finally:
+                _stop_tracing()
+            if not own_peak:
+                peak_memory = float('nan')
+
+            stats = ''
+            if profiler is not None:
+                stream = io.StringIO()
+                pstats.Stats(profiler, stream=stream).sort_stats('cumulative').print_stats(self.n_top)
+                stats = stream.getvalue()
+
+            allocations = pd.DataFrame.from_records([(str(stat.traceback), stat.size_diff / 1e6, stat.count_diff)
+                                                     for stat in top_allocations],
+                                                    columns=['Location', 'Size (MB)', 'Blocks'])
+            self.stages.append({'Stage': name,
+                                'Time (s)': elapsed,
+                                'Peak memory (MB)': (peak_memory - start_memory) / 1e6,
+                                'Retained memory (MB)': (current_memory - start_memory) / 1e6,
+                                'cProfile': stats,
+                                'Top allocations': allocations})
+
+    @staticmethod
+    def _snapshot():
+        # Allocations made by the profiler itself are not reported
+        return tracemalloc.take_snapshot().filter_traces((tracemalloc.Filter(False, tracemalloc.__file__),
+                                                          tracemalloc.Filter(False, __file__)))
+
+    def report(self):
+        '''
+        This function returns the measurements of all the stages.
+
+        Returns
+        -------
+        report : dict
+            A dictionary containing a 'summary' pandas.DataFrame with the time, peak memory and retained memory of each
+            stage, and a 'stages' dict where each stage has its cProfile stats ('cProfile', as text) and its top
+            allocation sites ('Top allocations', as a pandas.DataFrame).
+        '''
+        summary = pd.DataFrame([dict((k, v) for k, v in stage.items() if k in ('Stage',
+                                                                             'Time (s)',
+                                                                             'Peak memory (MB)',
+                                                                             'Retained memory (MB)'))
+                                for stage in self.stages],
+                               columns=['Stage', 'Time (s)', 'Peak memory (MB)', 'Retained memory (MB)'])
+        summary = summary.set_index('Stage')
+        stages = dict((stage['Stage'], {'cProfile': stage['cProfile'],
+                                        'Top allocations': stage['Top allocations']})
+                      for stage in self.stages)
+        return {'summary': summary, 'stages': stages}
+
+    def write(self, filename):
+        '''
+        This function writes the measurements of all the stages into a text file.
+
+        Parameters
+        ----------
+        filename : str
+            Filename of the report. It is preferable to use absolute path.
+        '''
+        report = self.report()
+        with open(filename, 'w') as f:
+            f.write('Summary\n=======\n')
+            f.write(report['summary'].to_string())
+            f.write('\n')
+            for name, stage in report['stages'].items():
+                f.write('\n{}\n{}\n'.format(name, '=' * len(name)))
+                f.write('Top allocations\n---------------\n')
+                f.write(stage['Top allocations'].to_string(index=False))
+                f.write('\n\ncProfile\n--------\n')
+                f.write(stage['cProfile'])
+
+
+def profiled_output(result, profiler, profile):
+    '''
+    Returns the result of an analysis according to its profile argument: the result alone when profile is False, the
+    result and the profiling report when profile is True, or the result alone after writing the report when profile is
+    a filename.
+    '''
+    if not profile:
+        return result
+    elif profile is True:
+        return result, profiler.report()
+    else:
+        profiler.write(profile)
+        return result
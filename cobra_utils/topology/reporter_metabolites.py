@@ -4,13 +4,19 @@ from __future__ import absolute_import
 
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
 
-from sklearn.utils import resample
 from cobra_utils import query
+from cobra_utils.io.arrow_data import dataframe_to_table
+from cobra_utils.query.gene_mapping import GeneMapper
+from cobra_utils.topology import scoring
+from cobra_utils.topology.network_stats import met_network_stats
+from cobra_utils.topology.profiling import StageProfiler, profiled_output
 
 
-def reporter_metabolites(model, p_val_df, genes=None, verbose=True):
+def reporter_metabolites(model, p_val_df, genes=None, verbose=True, output='pandas', max_degree=None, exclude_mets=None,
+                         met_stats=None, gene_mapper=None, normalize_ids=None, gene_aliases=None,
+                         profile=False, correction='fdr_bh',
+                         n_samples=100000, seed=None, background_cache=True, cache_dir=None):
     '''
     This function computes an aggregate p-value for each metabolite based on the network topology of the metabolic
     reconstruction. It takes the p-value for differential expression of each gene and compute the aggregate p-value
@@ -37,99 +43,133 @@ def reporter_metabolites(model, p_val_df, genes=None, verbose=True):
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
-    Returns
-    -------
-    met_p_values : pandas.DataFrame
-        A dataframe reporting the respective p-values for the metabolites that had associated genes containing a p-value
-        in p_val_matrix. Additionally, the corrected, mean and std Z values as well as gene number for the given metabolite
-        are reported in each case.
-    '''
-    if verbose:
-        print('Running reporter metabolites analysis')
-    # Drop nan genes
-    df = p_val_df.dropna(how='all', axis=0)
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table where the index is stored in the 'MetID'
+        dictionary-encoded column (See cobra_utils.io.arrow_data).
 
-    # Evaluate information of dataframe
-    if 'value' not in list(df.columns):
-        cols = list(df.columns)
-        df.rename(columns={cols[0] : 'value'}, inplace=True)
+    max_degree : int, None by default.
+        Metabolites participating in more than max_degree reactions (hub or currency metabolites such as h2o or atp)
+        are excluded before computing any score.
 
-    if not isinstance(df.index, str):
-        df.index = df.index.map(str)
+    exclude_mets : array-like, None by default.
+        An array or list containing metabolite ids (str) to be excluded before computing any score.
 
-    # Get gene Z scores
-    gene_Z_scores = pd.DataFrame(stats.norm.ppf(df.values) * -1.0, index=df.index, columns=['value'])
+    met_stats : pandas.DataFrame, None by default.
+        Network statistics of the model, as returned by cobra_utils.topology.met_network_stats. Used with max_degree.
+        If None, they are computed when max_degree is given. Passing them avoids recomputing them in every call.
 
-    # Convert inf values to numerical values
-    gene_Z_scores = gene_Z_scores.replace(np.inf, 15.0)
-    gene_Z_scores = gene_Z_scores.replace(-np.inf, -15.0)
-    gene_Z_scores = gene_Z_scores.dropna()
+    gene_mapper : cobra_utils.query.GeneMapper, None by default.
+        The lookup used to match the gene names in p_val_df with the model genes. If None, it is built from the model,
+        normalize_ids and gene_aliases. Passing it avoids rebuilding it in every call.
 
-    # Mets - Genes info
-    met_info = query.met_info_from_model(model=model,
-                                         verbose=verbose)
-    met_info = met_info.loc[met_info.GeneID.isin(list(gene_Z_scores.index))]
+    normalize_ids : array-like or callable, None by default.
+        Normalization rules applied to the gene names before matching them with the model genes, e.g. ['version',
+        'lower']. See cobra_utils.query.GeneMapper for the options. If None, gene names are matched exactly.
 
-    if genes is not None:
-        met_info = met_info.loc[met_info.GeneID.isin(genes)]
+    gene_aliases : dict, None by default.
+        A mapping from alternative gene names to model gene ids. See cobra_utils.query.GeneMapper.
 
-    unique_mets = met_info.MetID.unique()
+    profile : boolean or str, False by default.
+        A variable to measure the time, cProfile stats and tracemalloc allocations of each stage of the analysis (See
+        cobra_utils.topology.StageProfiler). If True, the profiling report is returned together with the results. If a
+        filename is given, the report is written into that file.
 
-    met_info = met_info[['MetID', 'GeneID']]
-    met_info = met_info.loc[met_info.GeneID != '']
-    met_info.drop_duplicates(inplace=True)
+    correction : str, 'fdr_bh' by default.
+        Method to adjust the p-values for multiple testing, reported in the 'adjusted p-value' column. Options to use:
+        'fdr_bh' for Benjamini-Hochberg false discovery rate
+        'bonferroni' for Bonferroni correction
+        None to skip the adjustment.
 
-    # For each metabolite calculate the aggregate Z-score and keep track of the number of neighbouring genes
-    Z_scores = np.empty((len(unique_mets), 4))
-    Z_scores[:] = np.nan
-    Z_scores = pd.DataFrame(Z_scores, index=unique_mets, columns=['Z-score', 'Mean-Z', 'Std-Z', 'Genes-Number'])
+    n_samples : int, 100000 by default.
+        Number of random gene sets sampled for each set size to correct the Z-scores for background.
 
-    for met in unique_mets:
-        met_genes = met_info.loc[met_info.MetID == met]['GeneID'].unique()
-        met_genes = list(set(met_genes).intersection(set(gene_Z_scores.index)))
+    seed : int, None by default.
+        Seed of the random gene sets. See cobra_utils.topology.background_z_stats.
 
-        if len(met_genes) > 0:
-            Z_scores.loc[met, 'Z-score'] = np.nansum(gene_Z_scores.loc[met_genes]['value'].values) / np.sqrt(len(met_genes))
-            Z_scores.loc[met, 'Mean-Z'] = np.nanmean(gene_Z_scores.loc[met_genes]['value'].values)
-            Z_scores.loc[met, 'Std-Z'] = np.nanstd(gene_Z_scores.loc[met_genes]['value'].values)
-            Z_scores.loc[met, 'Genes-Number'] = len(met_genes)
+    background_cache : boolean, True by default.
+        A variable to reuse the background statistics computed in previous calls with the same gene Z-scores,
+        n_samples and seed, skipping the sampling. It has no effect with the default seed=None: unseeded calls always
+        draw new random gene sets, so a seed is required to reuse them. See cobra_utils.topology.background_z_stats.
 
-    # Remove the metabolites which have no Z-scores
-    Z_scores = Z_scores.loc[~Z_scores['Z-score'].isna()]
+    cache_dir : str, None by default.
+        A directory where the background statistics are also stored, to reuse them across runs. Only used when
+        background_cache is True and seed is not None.
 
-    # Correct for background by calculating the mean Z-score for random sets of the same size as the ones that
-    # were found for the metabolites
-    for i, size in enumerate(Z_scores['Genes-Number'].unique()):
-        size = int(size)
-        # Sample 100000 sets for each size. Sample with replacement
-        n_samples = 100000
-
-        random_Z_set = np.empty((n_samples, size))
+    Returns
+    -------
+    met_p_values : pandas.DataFrame or pyarrow.Table
+        A table reporting the respective p-values for the metabolites that had associated genes containing a p-value
+        in p_val_matrix, computed from the survival function of the normal distribution. Additionally, the adjusted
+        p-values, the log10 p-values (which do not underflow to 0), the corrected, mean and std Z values as well as
+        gene number for the given metabolite are reported in each case.
+
+    profile_report : dict
+        Only returned when profile is True. See cobra_utils.topology.StageProfiler.report.
+    '''
+    if output not in ('pandas', 'arrow'):
+        raise NotImplementedError("Output {} not implemented. Specify 'pandas' or 'arrow'".format(output))
+    if verbose:
+        print('Running reporter metabolites analysis')
+    profiler = StageProfiler(enabled=bool(profile))
 
-        for j in range(size):
-            random_Z_set[:, j] = resample(gene_Z_scores.values, n_samples=n_samples).flatten()
+    # Get gene Z scores
+    with profiler.stage('gene Z-scores'):
+        gene_Z_scores = scoring.gene_z_scores(p_val_df)
+
+    # Match genes with the model genes, as integer positions
+    with profiler.stage('gene mapping'):
+        if gene_mapper is None:
+            gene_mapper = GeneMapper(model, normalize=normalize_ids, aliases=gene_aliases)
+        model_Z = scoring.model_gene_z_scores(gene_Z_scores, gene_mapper, verbose=verbose)
+
+    with profiler.stage('gene sets'):
+        # Exclude hub metabolites before building their gene sets
+        excluded_mets = set()
+        if exclude_mets is not None:
+            excluded_mets.update(exclude_mets)
+        if max_degree is not None:
+            if met_stats is None:
+                met_stats = met_network_stats(model=model,
+                                              verbose=verbose)
+            excluded_mets.update(met_stats.index[met_stats['Degree'] > max_degree])
+
+        # Mets - Genes info
+        if len(excluded_mets) == 0:
+            met_info = query.met_info_from_model(model=model,
+                                                 verbose=verbose)
+        else:
+            if verbose:
+                print('Excluding {} metabolites'.format(len(excluded_mets)))
+            kept_mets = [met.id for met in model.metabolites if met.id not in excluded_mets]
+            met_info = query.met_info_from_metabolites(model=model,
+                                                       metabolites=kept_mets,
+                                                       verbose=False)
+
+        gene_positions = gene_mapper.gene_ids.get_indexer(met_info.GeneID.values)
+        mask = gene_positions >= 0
+        if genes is not None:
+            mask &= np.isin(gene_positions, gene_mapper.resolve(genes)[0])
+        met_codes, unique_mets = pd.factorize(met_info.MetID.values[mask])
+        gene_positions = gene_positions[mask]
+        del met_info
 
-        bg_Z = np.nansum(random_Z_set, axis=1) / np.sqrt(size)
-        mean_bg_Z = np.nanmean(bg_Z)
-        std_bg_Z = np.nanstd(bg_Z)
+    # For each metabolite calculate the aggregate Z-score and keep track of the number of neighbouring genes
+    with profiler.stage('aggregation'):
+        Z_scores = scoring.aggregate_z_scores(met_codes, gene_positions, model_Z, unique_mets)
 
-        Z_scores.loc[Z_scores['Genes-Number'] == size, 'Z-score'] = (Z_scores.loc[Z_scores['Genes-Number'] == size, 'Z-score'].values - mean_bg_Z) / std_bg_Z
+    # Correct for background by calculating the mean Z-score for random sets of the same size as the ones that
+    # were found for the metabolites
+    with profiler.stage('background'):
+        Z_scores = scoring.correct_background(Z_scores,
+                                              gene_Z_scores.values,
+                                              n_samples=n_samples,
+                                              seed=seed,
+                                              cache=background_cache,
+                                              cache_dir=cache_dir)
 
     # Calculate p-values
-    met_p_values = Z_scores['Z-score'].apply(lambda x: 1.0 - stats.norm.cdf(x)).to_frame()
-    met_p_values.rename(columns={'Z-score': 'p-value'}, inplace=True)
-
-    # Report results
-    met_p_values['corrected Z'] = Z_scores['Z-score'].values
-    met_p_values['mean Z'] = Z_scores['Mean-Z'].values
-    met_p_values['std Z'] = Z_scores['Std-Z'].values
-    met_p_values['gene number'] = Z_scores['Genes-Number'].values
-
-    #Sort p-values from smallest value.
-    met_p_values.sort_values(by='p-value', ascending=True, inplace=True)
-    return met_p_values
-
-
-
-
-
+    with profiler.stage('p-values'):
+        met_p_values = scoring.p_values_table(Z_scores, correction=correction)
+        if output == 'arrow':
+            met_p_values = dataframe_to_table(met_p_values, index_label='MetID')
+    return profiled_output(met_p_values, profiler, profile)
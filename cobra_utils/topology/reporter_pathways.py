@@ -4,14 +4,17 @@ from __future__ import absolute_import
 
 import numpy as np
 import pandas as pd
-import scipy.stats as stats
 
-from sklearn.utils import resample
 from cobra_utils import query
-from _collections import defaultdict
+from cobra_utils.io.arrow_data import dataframe_to_table
+from cobra_utils.query.gene_mapping import GeneMapper
+from cobra_utils.topology import scoring
+from cobra_utils.topology.profiling import StageProfiler, profiled_output
 
 
-def reporter_pathways(model, p_val_df, pathways=None, rxn_pathways_association=None, verbose=True):
+def reporter_pathways(model, p_val_df, pathways=None, rxn_pathways_association=None, verbose=True, output='pandas',
+                      gene_mapper=None, normalize_ids=None, gene_aliases=None, profile=False,
+                      correction='fdr_bh', n_samples=100000, seed=None, background_cache=True, cache_dir=None):
     '''
     This function computes an aggregate p-value for each pathway (SubSystem in the metabolic reconstruction) based on the
     network topology of the metabolic reconstruction. It takes the p-value for differential expression of each gene and
@@ -36,110 +39,117 @@ def reporter_pathways(model, p_val_df, pathways=None, rxn_pathways_association=N
     verbose : boolean, True by default.
         A variable to enable or disable the printings of this function.
 
+    output : str, 'pandas' by default.
+        Type of the returned table. Use 'arrow' to get a pyarrow.Table where the index is stored in the 'SubSystem'
+        dictionary-encoded column (See cobra_utils.io.arrow_data).
+
+    gene_mapper : cobra_utils.query.GeneMapper, None by default.
+        The lookup used to match the gene names in p_val_df with the model genes. If None, it is built from the model,
+        normalize_ids and gene_aliases. Passing it avoids rebuilding it in every call.
+
+    normalize_ids : array-like or callable, None by default.
+        Normalization rules applied to the gene names before matching them with the model genes, e.g. ['version',
+        'lower']. See cobra_utils.query.GeneMapper for the options. If None, gene names are matched exactly.
+
+    gene_aliases : dict, None by default.
+        A mapping from alternative gene names to model gene ids. See cobra_utils.query.GeneMapper.
+
+    profile : boolean or str, False by default.
+        A variable to measure the time, cProfile stats and tracemalloc allocations of each stage of the analysis (See
+        cobra_utils.topology.StageProfiler). If True, the profiling report is returned together with the results. If a
+        filename is given, the report is written into that file.
+
+    correction : str, 'fdr_bh' by default.
+        Method to adjust the p-values for multiple testing, reported in the 'adjusted p-value' column. Options to use:
+        'fdr_bh' for Benjamini-Hochberg false discovery rate
+        'bonferroni' for Bonferroni correction
+        None to skip the adjustment.
+
+    n_samples : int, 100000 by default.
+        Number of random gene sets sampled for each set size to correct the Z-scores for background.
+
+    seed : int, None by default.
+        Seed of the random gene sets. See cobra_utils.topology.background_z_stats.
+
+    background_cache : boolean, True by default.
+        A variable to reuse the background statistics computed in previous calls with the same gene Z-scores,
+        n_samples and seed, skipping the sampling. It has no effect with the default seed=None: unseeded calls always
+        draw new random gene sets, so a seed is required to reuse them. See cobra_utils.topology.background_z_stats.
+
+    cache_dir : str, None by default.
+        A directory where the background statistics are also stored, to reuse them across runs. Only used when
+        background_cache is True and seed is not None.
+
     Returns
     -------
-    path_p_values : pandas.DataFrame
-        A dataframe reporting the respective p-values for the pathways that had associated genes containing a p-value
-        in p_val_matrix. Additionally, the corrected, mean and std Z values as well as gene number for the given pathway
-        are reported in each case.
+    path_p_values : pandas.DataFrame or pyarrow.Table
+        A table reporting the respective p-values for the pathways that had associated genes containing a p-value
+        in p_val_matrix, computed from the survival function of the normal distribution. Additionally, the adjusted
+        p-values, the log10 p-values (which do not underflow to 0), the corrected, mean and std Z values as well as
+        gene number for the given pathway are reported in each case.
+
+    profile_report : dict
+        Only returned when profile is True. See cobra_utils.topology.StageProfiler.report.
     '''
+    if output not in ('pandas', 'arrow'):
+        raise NotImplementedError("Output {} not implemented. Specify 'pandas' or 'arrow'".format(output))
     if verbose:
         print('Running reporter pathways analysis')
-    # Drop nan genes
-    df = p_val_df.dropna(how='all', axis=0)
-
-    # Evaluate information of dataframe
-    if 'value' not in list(df.columns):
-        cols = list(df.columns)
-        df.rename(columns={cols[0] : 'value'}, inplace=True)
-
-    if not isinstance(df.index, str):
-        df.index = df.index.map(str)
+    profiler = StageProfiler(enabled=bool(profile))
 
     # Get gene Z scores
-    gene_Z_scores = pd.DataFrame(stats.norm.ppf(df.values) * -1.0, index=df.index, columns=['value'])
+    with profiler.stage('gene Z-scores'):
+        gene_Z_scores = scoring.gene_z_scores(p_val_df)
 
-    # Convert inf values to numerical values
-    gene_Z_scores = gene_Z_scores.replace(np.inf, 15.0)
-    gene_Z_scores = gene_Z_scores.replace(-np.inf, -15.0)
-    gene_Z_scores = gene_Z_scores.dropna()
+    # Match genes with the model genes, as integer positions
+    with profiler.stage('gene mapping'):
+        if gene_mapper is None:
+            gene_mapper = GeneMapper(model, normalize=normalize_ids, aliases=gene_aliases)
+        model_Z = scoring.model_gene_z_scores(gene_Z_scores, gene_mapper, verbose=verbose)
 
     # Genes - Rxn - SubSystems info
-    if rxn_pathways_association is None:
-        rxn_info = query.rxn_info_from_genes(model=model,
-                                             genes=list(df.index),
-                                             verbose=verbose)
-    else:
-        records = []
-        for key, val in rxn_pathways_association.items():
-            for reaction in val:
-                rxn = model.reactions.get_by_id(reaction)
-                if len(rxn.genes) != 0:
-                    for gene in rxn.genes:
-                        records.append((rxn.id, str(gene.id), key))
-        rxn_info = pd.DataFrame.from_records(records, columns=['RxnID', 'GeneID', 'SubSystem'])
-
-    if pathways is not None:
-        rxn_info = rxn_info.loc[rxn_info.SubSystem.isin(pathways)]
-
-    rxn_info = rxn_info[['GeneID', 'SubSystem']]
-    rxn_info = rxn_info.loc[rxn_info.GeneID != '']
-    rxn_info = rxn_info.loc[rxn_info.SubSystem != '']
-    rxn_info.drop_duplicates(inplace=True)
-
-    unique_pathways = rxn_info.SubSystem.unique()
+    with profiler.stage('gene sets'):
+        if rxn_pathways_association is None:
+            rxn_info = query.rxn_info_from_genes(model=model,
+                                                 genes=list(gene_mapper.gene_ids[~np.isnan(model_Z)]),
+                                                 verbose=verbose)
+        else:
+            records = []
+            for key, val in rxn_pathways_association.items():
+                for reaction in val:
+                    rxn = model.reactions.get_by_id(reaction)
+                    if len(rxn.genes) != 0:
+                        for gene in rxn.genes:
+                            records.append((rxn.id, str(gene.id), key))
+            rxn_info = pd.DataFrame.from_records(records, columns=['RxnID', 'GeneID', 'SubSystem'])
+
+        if pathways is not None:
+            rxn_info = rxn_info.loc[rxn_info.SubSystem.isin(pathways)]
+        rxn_info = rxn_info.loc[rxn_info.SubSystem != '']
+
+        gene_positions = gene_mapper.gene_ids.get_indexer(rxn_info.GeneID.values)
+        mask = gene_positions >= 0
+        path_codes, unique_pathways = pd.factorize(rxn_info.SubSystem.values[mask])
+        gene_positions = gene_positions[mask]
+        del rxn_info
 
     # For each pathway calculate the aggregate Z-score and keep track of the number of neighbouring genes
-    Z_scores = np.empty((len(unique_pathways), 4))
-    Z_scores[:] = np.nan
-    Z_scores = pd.DataFrame(Z_scores, index=unique_pathways, columns=['Z-score', 'Mean-Z', 'Std-Z', 'Genes-Number'])
-
-    for path in unique_pathways:
-        path_genes = rxn_info.loc[rxn_info.SubSystem == path]['GeneID'].unique().tolist()
-        path_genes = list(set(path_genes).intersection(set(gene_Z_scores.index)))
-
-        if len(path_genes) > 0:
-            Z_scores.loc[path, 'Z-score'] = np.nansum(gene_Z_scores.loc[path_genes]['value'].values) / np.sqrt(len(path_genes))
-            Z_scores.loc[path, 'Mean-Z'] = np.nanmean(gene_Z_scores.loc[path_genes]['value'].values)
-            Z_scores.loc[path, 'Std-Z'] = np.nanstd(gene_Z_scores.loc[path_genes]['value'].values)
-            Z_scores.loc[path, 'Genes-Number'] = len(path_genes)
-
-    # Remove the metabolites which have no Z-scores
-    Z_scores = Z_scores.loc[~Z_scores['Z-score'].isna()]
+    with profiler.stage('aggregation'):
+        Z_scores = scoring.aggregate_z_scores(path_codes, gene_positions, model_Z, unique_pathways)
 
     # Correct for background by calculating the mean Z-score for random sets of the same size as the ones that
     # were found for the pathways
-    for i, size in enumerate(Z_scores['Genes-Number'].unique()):
-        size = int(size)
-        # Sample 100000 sets for each size. Sample with replacement
-        n_samples = 100000
-
-        random_Z_set = np.empty((n_samples, size))
-
-        for j in range(size):
-            random_Z_set[:, j] = resample(gene_Z_scores.values, n_samples=n_samples).flatten()
-
-        bg_Z = np.nansum(random_Z_set, axis=1) / np.sqrt(size)
-        mean_bg_Z = np.nanmean(bg_Z)
-        std_bg_Z = np.nanstd(bg_Z)
-
-        Z_scores.loc[Z_scores['Genes-Number'] == size, 'Z-score'] = (Z_scores.loc[Z_scores['Genes-Number'] == size, 'Z-score'].values - mean_bg_Z) / std_bg_Z
+    with profiler.stage('background'):
+        Z_scores = scoring.correct_background(Z_scores,
+                                              gene_Z_scores.values,
+                                              n_samples=n_samples,
+                                              seed=seed,
+                                              cache=background_cache,
+                                              cache_dir=cache_dir)
 
     # Calculate p-values
-    path_p_values = Z_scores['Z-score'].apply(lambda x: 1.0 - stats.norm.cdf(x)).to_frame()
-    path_p_values.rename(columns={'Z-score': 'p-value'}, inplace=True)
-
-    # Report results
-    path_p_values['corrected Z'] = Z_scores['Z-score'].values
-    path_p_values['mean Z'] = Z_scores['Mean-Z'].values
-    path_p_values['std Z'] = Z_scores['Std-Z'].values
-    path_p_values['gene number'] = Z_scores['Genes-Number'].values
-
-    #Sort p-values from smallest value.
-    path_p_values.sort_values(by='p-value', ascending=True, inplace=True)
-    return path_p_values
-
-
-
-
-
+    with profiler.stage('p-values'):
+        path_p_values = scoring.p_values_table(Z_scores, correction=correction)
+        if output == 'arrow':
+            path_p_values = dataframe_to_table(path_p_values, index_label='SubSystem')
+    return profiled_output(path_p_values, profiler, profile)
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+from __future__ import absolute_import
+
+import numpy as np
+import pandas as pd
+import scipy.stats as stats
+
+from cobra_utils.topology.background import background_z_stats
+
+
+def gene_z_scores(p_val_df):
+    '''
+    This function converts the p-values for differential expression of each gene into Z-scores.
+
+    Parameters
+    ----------
+    p_val_df : pandas.DataFrame
+        A dataframe with gene names as index. The p-values are taken from the 'value' column, or from the first column
+        if there is no 'value' column.
+
+    Returns
+    -------
+    gene_Z_scores : pandas.Series
+        A series with gene names (str) as index containing the Z-scores. Infinite values are replaced by +/-15 and
+        genes without p-value are dropped.
+    '''
+    df = p_val_df.dropna(how='all', axis=0)
+    if 'value' in list(df.columns):
+        values = df['value']
+    else:
+        values = df[df.columns[0]]
+
+    gene_Z_scores = pd.Series(stats.norm.ppf(values.values) * -1.0, index=df.index.map(str), name='value')
+
+    # Convert inf values to numerical values
+    gene_Z_scores = gene_Z_scores.replace(np.inf, 15.0)
+    gene_Z_scores = gene_Z_scores.replace(-np.inf, -15.0)
+    gene_Z_scores = gene_Z_scores.dropna()
+    return gene_Z_scores
+
+
+def model_gene_z_scores(gene_Z_scores, gene_mapper, verbose=True):
+    '''
+    This function places the gene Z-scores in the positions of the model genes.
+
+    Parameters
+    ----------
+    gene_Z_scores : pandas.Series
+        A series with gene names as index containing the Z-scores, as returned by gene_z_scores.
+
+    gene_mapper : cobra_utils.query.GeneMapper
+        The lookup used to match the gene names with the model genes.
+
+    verbose : boolean, True by default.
+        A variable to warn about the genes that are not in the model.
+
+    Returns
+    -------
+    model_Z : numpy.ndarray
+        An array with the Z-score of each gene in gene_mapper.gene_ids, or NaN when the gene has no Z-score. If many
+        genes match the same model gene, the first one is used.
+    '''
+    positions, _ = gene_mapper.resolve(gene_Z_scores.index, verbose=verbose)
+    matched = (positions >= 0) & ~pd.Index(positions).duplicated(keep='first')
+    model_Z = np.full(len(gene_mapper.gene_ids), np.nan)
+    model_Z[positions[matched]] = gene_Z_scores.values[matched]
+    return model_Z
+
+
+def aggregate_z_scores(set_codes, gene_positions, model_Z, set_names):
+    '''
+    This function computes the aggregate Z-score of each gene set (e.g. genes associated to a metabolite or pathway).
+
+    Parameters
+    ----------
+    set_codes : numpy.ndarray
+        An array of int indicating the gene set of each association, as positions in set_names.
+
+    gene_positions : numpy.ndarray
+        An array of int indicating the model gene of each association, as positions in model_Z. Duplicated
+        associations are counted once.
+
+    model_Z : numpy.ndarray
+        An array with the Z-score of each model gene, as returned by model_gene_z_scores. Genes with NaN are ignored.
+
+    set_names : array-like
+        Names of the gene sets.
+
+    Returns
+    -------
+    Z_scores : pandas.DataFrame
+        A dataframe with set_names as index containing the 'Z-score', 'Mean-Z', 'Std-Z' and 'Genes-Number' of the
+        gene sets with at least one gene with Z-score.
+    '''
+    n_genes = len(model_Z)
+    n_sets = len(set_names)
+    pairs = np.unique(np.asarray(set_codes, dtype=np.int64) * n_genes + np.asarray(gene_positions, dtype=np.int64))
+    set_codes = pairs // n_genes
+    gene_Z = model_Z[pairs % n_genes]
+    valid = ~np.isnan(gene_Z)
+    set_codes = set_codes[valid]
+    gene_Z = gene_Z[valid]
+
+    genes_number = np.bincount(set_codes, minlength=n_sets).astype(float)
+    keep = genes_number > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        z_sum = np.bincount(set_codes, weights=gene_Z, minlength=n_sets)
+        mean_Z = z_sum / genes_number
+        std_Z = np.sqrt(np.bincount(set_codes, weights=(gene_Z - mean_Z[set_codes]) ** 2, minlength=n_sets) / genes_number)
+        Z_scores = pd.DataFrame({'Z-score': z_sum / np.sqrt(genes_number),
+                                 'Mean-Z': mean_Z,
+                                 'Std-Z': std_Z,
+                                 'Genes-Number': genes_number},
+                                index=set_names)
+    return Z_scores.loc[keep]
+
+
+def correct_background(Z_scores, background_Z, n_samples=100000, seed=None, cache=True, cache_dir=None):
+    '''
+    This function corrects the aggregate Z-scores for background by calculating the mean and std Z-score for random
+    sets of the same size as the gene sets.
+
+    Parameters
+    ----------
+    Z_scores : pandas.DataFrame
+        A dataframe as returned by aggregate_z_scores.
+
+    background_Z : numpy.ndarray
+        An array with the Z-scores from which the random sets are sampled.
+
+    n_samples, seed, cache, cache_dir :
+        Parameters of the random sets and their cache. See cobra_utils.topology.background_z_stats.
+
+    Returns
+    -------
+    Z_scores : pandas.DataFrame
+        The same dataframe with the corrected values in the 'Z-score' column.
+    '''
+    Z_scores = Z_scores.copy()
+    sizes = Z_scores['Genes-Number'].values.astype(int)
+    bg_stats = background_z_stats(background_Z,
+                                  sizes,
+                                  n_samples=n_samples,
+                                  seed=seed,
+                                  cache=cache,
+                                  cache_dir=cache_dir)
+    mean_bg_Z = bg_stats['Mean-Z'].reindex(sizes).values
+    std_bg_Z = bg_stats['Std-Z'].reindex(sizes).values
+    Z_scores['Z-score'] = (Z_scores['Z-score'].values - mean_bg_Z) / std_bg_Z
+    return Z_scores
+
+
+def z_to_p_values(Z, log=False):
+    '''
+    This function computes the one-tailed p-values of Z-scores with the survival function of the normal distribution,
+    which keeps its precision for large Z-scores (unlike 1 - cdf, that underflows to 0).
+
+    Parameters
+    ----------
+    Z : array-like
+        An array of Z-scores of any shape, e.g. gene sets x contrasts.
+
+    log : boolean, False by default.
+        A variable to return the natural logarithm of the p-values, which do not underflow even for p-values
+        smaller than 1e-308.
+
+    Returns
+    -------
+    p_values : numpy.ndarray
+        An array with the same shape as Z containing the p-values (or their logarithm).
+    '''
+    Z = np.asarray(Z, dtype=float)
+    if log:
+        return stats.norm.logsf(Z)
+    return stats.norm.sf(Z)
+
+
+def adjust_p_values(p_values, method='fdr_bh', log=False):
+    '''
+    This function adjusts p-values for multiple testing. Each column is treated as an independent family of tests
+    (e.g. a contrast), and all of them are adjusted in a single array operation. NaN values are ignored.
+
+    Parameters
+    ----------
+    p_values : array-like
+        A 1D array of p-values, or a 2D array of tests x contrasts.
+
+    method : str, 'fdr_bh' by default.
+        Method to use. Options to use:
+        'fdr_bh' for Benjamini-Hochberg false discovery rate
+        'bonferroni' for Bonferroni correction
+
+    log : boolean, False by default.
+        A variable indicating that p_values are natural logarithms of p-values, as returned by z_to_p_values with
+        log=True. In that case, the adjustment is computed in log-space and the logarithm of the adjusted p-values is
+        returned.
+
+    Returns
+    -------
+    adjusted_p_values : numpy.ndarray
+        An array with the same shape as p_values containing the adjusted p-values (or their logarithm).
+    '''
+    p_values = np.asarray(p_values, dtype=float)
+    one_dimensional = p_values.ndim == 1
+    log_p = p_values.reshape(len(p_values), -1) if len(p_values) != 0 else p_values.reshape(0, 1)
+    if not log:
+        with np.errstate(divide='ignore'):
+            log_p = np.log(log_p)
+
+    n_tests = np.sum(~np.isnan(log_p), axis=0)
+    if method == 'bonferroni':
+        with np.errstate(divide='ignore'):
+            log_adjusted = log_p + np.log(n_tests)
+    elif method == 'fdr_bh':
+        # NaNs are sorted at the end, so the first n_tests values of each column are the valid ones
+        order = np.argsort(log_p, axis=0, kind='stable')
+        log_sorted = np.take_along_axis(log_p, order, axis=0)
+        ranks = np.arange(1, log_p.shape[0] + 1).reshape(-1, 1)
+        with np.errstate(divide='ignore'):
+            log_sorted = log_sorted + np.log(n_tests) - np.log(ranks)
+        # Cumulative minimum from the largest p-value, ignoring NaNs
+        log_sorted = np.fmin.accumulate(log_sorted[::-1], axis=0)[::-1]
+        log_sorted[np.isnan(np.take_along_axis(log_p, order, axis=0))] = np.nan
+        log_adjusted = np.empty_like(log_sorted)
+        np.put_along_axis(log_adjusted, order, log_sorted, axis=0)
+    else:
+        raise NotImplementedError("Method {} not implemented. Specify 'fdr_bh' or 'bonferroni'".format(method))
+
+    log_adjusted = np.minimum(log_adjusted, 0.0)
+    if one_dimensional:
+        log_adjusted = log_adjusted.flatten()
+    if log:
+        return log_adjusted
+    return np.exp(log_adjusted)
+
+
+def p_values_table(Z_scores, correction='fdr_bh'):
+    '''
+    This function computes the p-values from the corrected Z-scores and reports them sorted from the smallest value.
+
+    Parameters
+    ----------
+    Z_scores : pandas.DataFrame
+        A dataframe as returned by correct_background.
+
+    correction : str, 'fdr_bh' by default.
+        Method to adjust the p-values for multiple testing ('fdr_bh' or 'bonferroni'). See adjust_p_values. If None,
+        the p-values are not adjusted.
+
+    Returns
+    -------
+    p_values : pandas.DataFrame
+        A dataframe containing the 'p-value', 'adjusted p-value' (if correction is not None), 'log10 p-value',
+        'corrected Z', 'mean Z', 'std Z' and 'gene number' of each gene set.
+    '''
+    log_p = z_to_p_values(Z_scores['Z-score'].values, log=True)
+    p_values = pd.DataFrame({'p-value': np.exp(log_p)}, index=Z_scores.index)
+    if correction is not None:
+        p_values['adjusted p-value'] = np.exp(adjust_p_values(log_p, method=correction, log=True))
+    p_values['log10 p-value'] = log_p / np.log(10.0)
+
+    # Report results
+    p_values['corrected Z'] = Z_scores['Z-score'].values
+    p_values['mean Z'] = Z_scores['Mean-Z'].values
+    p_values['std Z'] = Z_scores['Std-Z'].values
+    p_values['gene number'] = Z_scores['Genes-Number'].values
+
+    #Sort p-values from smallest value. The logarithm keeps the order of p-values that underflow to 0.
+    p_values.sort_values(by='log10 p-value', ascending=True, inplace=True)
+    return p_values
@@ -90,10 +90,12 @@ setup(name='cobra_utils',
                         'xlrd >= 1.1',
                         'openpyxl >= 2.5',
                         'cobra >= 0.13.4',
-                        'scikit-learn'
+                        'scipy'
                         ],
+      extras_require={'arrow': ['pyarrow >= 1.0'],
+                      'zstd': ['zstandard']},
       classifiers=classifiers,
-      entry_points={},
+      entry_points={'console_scripts': ['cobra-utils = cobra_utils.cli:main']},
       package_data={},
       cmdclass={'install': CustomInstallCommand,
                 'develop': CustomDevelopCommand,